@@ -0,0 +1,70 @@
+"""Benchmark atcf.parse_sector() against line-by-line atcf.parse_storm().
+
+Usage: python3 benchmarks/atcf_parse.py [LINES] [REPEAT]
+"""
+
+import random
+import sys
+import timeit
+from cyclomonitor import atcf
+
+BASINS = [("ATL", "L"), ("EPAC", "E"), ("WPAC", "W"), ("IO", "A"), ("SHEM", "S")]
+CLASSES = ["DB", "LO", "TD", "TS", "TY", "SD", "SS", "EX"]
+
+
+def synthetic_sector_files(lines: int, seed=0):
+    """Return (atcf_text, interp_text) with the given number of storms."""
+    rng = random.Random(seed)
+    atcf_lines = []
+    interp_lines = []
+    for i in range(lines):
+        basin, letter = rng.choice(BASINS)
+        num = f"{i % 100:02d}"
+        year = rng.randint(0, 24)
+        date = f"{year:02d}{rng.randint(1, 12):02d}{rng.randint(1, 28):02d}"
+        hhmm = f"{rng.choice((0, 6, 12, 18)):02d}00"
+        lat = rng.uniform(-40, 40)
+        lon = rng.uniform(-180, 180)
+        wind = rng.randint(15, 160)
+        pres = rng.randint(880, 1012)
+        atcf_lines.append(
+            f"{num}{letter} INVEST {date} {hhmm} "
+            f"{abs(lat):.1f}{'S' if lat < 0 else 'N'} "
+            f"{abs(lon):.1f}{'W' if lon < 0 else 'E'} {basin} {wind} {pres}"
+        )
+        interp_lines.append(
+            f"{basin[:2].lower()}{num}20{year:02d} INVEST {date} {hhmm} "
+            f"{lat:.2f} {lon:.2f} {letter} {rng.choice(CLASSES)} {wind} {pres} "
+            f"{rng.randint(0, 30)} {rng.randint(0, 359)}"
+        )
+    return "\n".join(atcf_lines) + "\n", "\n".join(interp_lines) + "\n"
+
+
+def per_line(atcf_text: str, interp_text: str):
+    for line, interp_line in zip(atcf_text.splitlines(), interp_text.splitlines()):
+        record = atcf.parse_storm(line)
+        atcf.parse_storm(interp_line, mode="interp", record=record)
+
+
+def batch(atcf_text: str, interp_text: str):
+    atcf.parse_sector(atcf_text)
+    atcf.parse_sector(interp_text, mode="interp")
+
+
+def main():
+    lines = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    repeat = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    atcf_text, interp_text = synthetic_sector_files(lines)
+    print(f"{lines} lines, best of {repeat}")
+    results = {}
+    for func in (per_line, batch):
+        best = min(
+            timeit.repeat(lambda: func(atcf_text, interp_text), number=1, repeat=repeat)
+        )
+        results[func.__name__] = best
+        print(f"{func.__name__:>10}: {best * 1000:8.2f} ms")
+    print(f"   speedup: {results['per_line'] / results['batch']:8.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""Benchmark the IBTrACS CSV importer on synthetic data.
+
+The full archive has roughly 700000 rows.
+
+Usage: python3 benchmarks/ibtracs_import.py [ROWS]
+"""
+
+import gzip
+import logging
+import os
+import random
+import sys
+import tempfile
+import time
+from cyclomonitor import ibtracs
+
+SCHEMA_FILE = f"{ibtracs.PATH}/ibtracs_ALL.sql"
+
+
+def synthetic_csv(path: str, rows: int, seed=0):
+    """Write a gzipped CSV file shaped like the full archive to path."""
+    rng = random.Random(seed)
+    with open(SCHEMA_FILE) as f:
+        schema = f.read()
+    types = ibtracs._column_types(schema)
+    # columns that are never blank
+    required = [
+        "NOT NULL" in line for line in schema.splitlines() if line.startswith("  ")
+    ]
+    with gzip.open(path, "wt", compresslevel=ibtracs.RAW_COMPRESSION_LEVEL) as f:
+        f.write("SID,SEASON\n ,Year\n")
+        for i in range(rows):
+            row = []
+            for col, col_type in enumerate(types):
+                if col == 0:
+                    row.append(f"{1980 + i // 2000}{i % 1000:03d}N10100")
+                elif col == 6:
+                    row.append("2020-06-01 00:00:00")
+                elif not required[col] and rng.random() < 0.6:
+                    # most of the archive is blank
+                    row.append(" ")
+                elif col_type == "INTEGER":
+                    row.append(str(rng.randint(0, 200)))
+                elif col_type == "NUMERIC":
+                    row.append(f"{rng.uniform(-90, 90):.5f}")
+                elif col_type == "BIT":
+                    row.append("1")
+                else:
+                    row.append("TS")
+            f.write(",".join(row) + "\n")
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    # report the time spent in each stage
+    logging.basicConfig(format="%(message)s", level=logging.INFO)
+    with tempfile.TemporaryDirectory() as tmp:
+        csv = os.path.join(tmp, "data.csv.gz")
+        synthetic_csv(csv, rows)
+        ibtracs.DB = os.path.join(tmp, "BestTrack.db")
+        start = time.perf_counter()
+        ibtracs._import_csv("AllBestTrack", SCHEMA_FILE, csv)
+        elapsed = time.perf_counter() - start
+        size = os.path.getsize(ibtracs.DB) / 1024 / 1024
+    print(f"{rows} rows: {elapsed:.2f} s ({rows / elapsed:.0f} rows/s), {size:.1f} MiB")
+
+
+if __name__ == "__main__":
+    main()
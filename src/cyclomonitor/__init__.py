@@ -2,6 +2,7 @@ from . import server_vars
 from . import global_vars
 from . import atcf
 from . import errors
+from . import http_client
 from . import ibtracs
 from .uptime import *
 from .dir_calc import get_dir
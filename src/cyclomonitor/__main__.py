@@ -17,6 +17,8 @@ GNU Affero General Public License along with this program. If not, see
 """
 
 from . import cli
+from . import atcf
+from . import ibtracs
 import datetime
 import logging
 import asyncio
@@ -104,6 +106,14 @@ def main():
             SERVER = config["server"]
         if isinstance(config.get("emojis"), dict):
             emojis.update(config["emojis"])
+        if config.get("atcf_refresh_window") is not None:
+            atcf.REFRESH_WINDOW = float(config["atcf_refresh_window"])
+        if config.get("forecast_cache_size") is not None:
+            atcf.FORECAST_DISK_LIMIT = int(
+                float(config["forecast_cache_size"]) * 1024 * 1024
+            )
+        if config.get("best_track_cache_size") is not None:
+            ibtracs.CACHE_SIZE = int(config["best_track_cache_size"])
     if args.verbose:
         log_params["level"] = logging.DEBUG
     else:
@@ -6,21 +6,43 @@ CycloMonitor ATCF module
 Classes:
 ATCFError -- base exception for ATCF errors
 WrongData -- exception for invalid data
+StormRecord -- a single active storm
+StormTable -- indexed snapshot of active storms
+ChangeKind -- kinds of changes between two snapshots
+StormChange -- a change to a single storm
+InterpRow -- a row of interp data
+ForecastImage -- a cached forecast image
 Functions:
+snapshot -- get the current snapshot of active storms
+diff -- compare two snapshots
 reset -- reset ATCF data
-parse_storm -- parse ATCF data
-load -- load ATCF data
+parse_storm -- parse a line of ATCF data
+parse_sector -- parse a whole sector file
+load -- load ATCF data saved on disk
+warm_up -- load ATCF data saved on disk in the background
 get_data -- get ATCF data
 get_data_alt -- get ATCF data (alt source)
+get_forecast -- get the forecast image for an active TC
 """
 
 import datetime
+import enum
+import functools
+import hashlib
 import aiohttp
 import asyncio
 import json
 import logging
+import marshal
+import math
+import os
+import threading
+import time
 import aiofiles
-from itertools import zip_longest
+from collections import OrderedDict
+from dataclasses import dataclass, field, replace
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+from . import http_client
 from .locales import *
 
 # initalize variables
@@ -31,20 +53,28 @@ URL = "https://api.knackwx.com/atcf/v2"
 BASE_URL_NHC = "https://www.nhc.noaa.gov/storm_graphics/{0}/{1}_5day_cone.png"
 BASE_URL_NHC_EXPER = "https://www.nhc.noaa.gov/storm_graphics/{0}/{1}_5day_expCone.png"
 BASE_URL_JTWC = "https://www.metoc.navy.mil/jtwc/products/{0}.gif"
-cyclones = []
-names = []
-timestamps = []
-lats = []
-longs = []
-basins = []
-winds = []
-pressures = []
-tc_classes = []
-lats_real = []
-longs_real = []
-movement_speeds = []
-movement_dirs = []
-long_cids = []
+# maps the 2-character basin prefix used in sector files to the one used in
+# long ATCF IDs where they differ
+LONG_ID_PREFIXES = {"AT": "AL"}
+# An invest that disappears while a named or numbered storm forms within this
+# many degrees of it is considered to have been renamed by diff().
+RENAME_DISTANCE = 5.0
+# Binary cache of the current snapshot, used instead of the sector files when
+# loading data saved on disk
+SNAPSHOT_FILE = "atcf_snapshot.bin"
+SNAPSHOT_FORMAT = 1
+# Calls to get_data_alt() made within this many seconds of the last
+# successful download are answered from memory. Set to 0 to always download.
+REFRESH_WINDOW = 60
+# Forecast images are cached in this directory, one file per storm, product
+# and advisory
+FORECAST_CACHE_DIR = "forecast_cache"
+# How many bytes of forecast images are kept in memory and on disk
+FORECAST_MEMORY_LIMIT = 16 * 1024 * 1024
+FORECAST_DISK_LIMIT = 64 * 1024 * 1024
+# Cached forecast images older than this many seconds are revalidated with
+# the server before being used again
+FORECAST_MAX_AGE = 300
 log = logging.getLogger(__name__)
 
 # increase compatibility with python<3.11
@@ -70,38 +100,376 @@ class NoActiveStorms(ATCFError):
     pass
 
 
+class StormRecord:
+    """A single active storm.
+
+    Attributes:
+    cid -- short identifier (e.g. 01L)
+    name -- the storm's name, or INVEST
+    timestamp -- time of the fix in Unix time
+    lat -- latitude in degrees (negative is south)
+    lon -- longitude in degrees (negative is west)
+    basin -- the basin as given by ATCF
+    wind -- 1-minute sustained winds in knots
+    pressure -- minimum pressure in millibars
+    The following attributes come from the interp sector file, and are None
+    if it has no data for the storm:
+    tc_class -- ATCF classification (e.g. TS, SD, EX)
+    lat_real -- interpolated latitude
+    lon_real -- interpolated longitude
+    movement_speed -- movement speed in knots
+    movement_dir -- movement direction in degrees
+    long_cid -- long ATCF identifier (e.g. al012024)
+    """
+
+    __slots__ = (
+        "cid",
+        "name",
+        "timestamp",
+        "lat",
+        "lon",
+        "basin",
+        "wind",
+        "pressure",
+        "tc_class",
+        "lat_real",
+        "lon_real",
+        "movement_speed",
+        "movement_dir",
+        "long_cid",
+    )
+
+    def __init__(
+        self,
+        cid: str,
+        name: str,
+        timestamp: int,
+        lat: float,
+        lon: float,
+        basin: str,
+        wind: int,
+        pressure: int,
+        tc_class: Optional[str] = None,
+        lat_real: Optional[float] = None,
+        lon_real: Optional[float] = None,
+        movement_speed: Optional[float] = None,
+        movement_dir: Optional[float] = None,
+        long_cid: Optional[str] = None,
+    ):
+        self.cid = cid
+        self.name = name
+        self.timestamp = timestamp
+        self.lat = lat
+        self.lon = lon
+        self.basin = basin
+        self.wind = wind
+        self.pressure = pressure
+        self.tc_class = tc_class
+        self.lat_real = lat_real
+        self.lon_real = lon_real
+        self.movement_speed = movement_speed
+        self.movement_dir = movement_dir
+        self.long_cid = long_cid
+
+    def __repr__(self):
+        return f"<StormRecord {self.cid} {self.name}>"
+
+    @property
+    def atcf_id(self) -> str:
+        """Long ATCF ID in uppercase (e.g. AL012024).
+
+        If the interp data is missing, the ID is derived from the short ID,
+        basin and time of the fix.
+        """
+        if self.long_cid is not None:
+            return self.long_cid.upper()
+        prefix = self.basin[:2]
+        prefix = LONG_ID_PREFIXES.get(prefix, prefix)
+        year = datetime.datetime.fromtimestamp(self.timestamp, datetime.UTC).year
+        return f"{prefix}{self.cid[:2]}{year}"
+
+    @property
+    def lat_str(self) -> str:
+        """Latitude as presented by ATCF (e.g. 12.3N)."""
+        return f"{abs(self.lat):.1f}{'S' if self.lat < 0 else 'N'}"
+
+    @property
+    def lon_str(self) -> str:
+        """Longitude as presented by ATCF (e.g. 45.6W)."""
+        return f"{abs(self.lon):.1f}{'W' if self.lon < 0 else 'E'}"
+
+
+class StormTable:
+    """An immutable, versioned snapshot of active storms.
+
+    Storms are kept in the order they were given. Lookups by short ID,
+    long ATCF ID, and name are constant-time. If more than one storm shares a
+    name (e.g. INVEST), lookups by name return the first one. If more than one
+    storm shares a short ID, the last one wins.
+    Snapshots are never modified after they are published, so a reader can
+    keep using the one it started with while a newer one is being built. The
+    StormRecords inside a snapshot must not be modified either.
+    Attributes:
+    version -- increases by one every time a snapshot is published
+    created -- time the snapshot was built in Unix time
+    digest -- hash of the sector files the snapshot was built from
+    Methods:
+    get() -- find a storm by short ID
+    get_by_long_id() -- find a storm by long ATCF ID
+    get_by_name() -- find a storm by name
+    find() -- find a storm by name or short ID
+    ids() -- list of short IDs
+    names() -- list of names
+    """
+
+    __slots__ = (
+        "version",
+        "created",
+        "digest",
+        "_records",
+        "_by_cid",
+        "_by_long_cid",
+        "_by_name",
+    )
+
+    def __init__(
+        self,
+        records: Iterable[StormRecord] = (),
+        *,
+        version: int = 0,
+        digest: Optional[str] = None,
+    ):
+        self.version = version
+        self.created = time.time()
+        self.digest = digest
+        by_cid: Dict[str, StormRecord] = {}
+        for record in records:
+            by_cid[record.cid] = record
+        self._records: Tuple[StormRecord, ...] = tuple(by_cid.values())
+        self._by_cid = by_cid
+        self._by_long_cid: Dict[str, StormRecord] = {}
+        self._by_name: Dict[str, StormRecord] = {}
+        for record in self._records:
+            if record.long_cid is not None:
+                self._by_long_cid[record.long_cid.upper()] = record
+            self._by_name.setdefault(record.name, record)
+
+    def __len__(self):
+        return len(self._records)
+
+    def __iter__(self) -> Iterator[StormRecord]:
+        return iter(self._records)
+
+    def __contains__(self, cid):
+        return cid in self._by_cid
+
+    def __repr__(self):
+        return f"<StormTable version {self.version} of {len(self._records)} storms>"
+
+    def get(self, cid: str) -> Optional[StormRecord]:
+        """Find a storm by its short ID (e.g. 01L)."""
+        return self._by_cid.get(cid)
+
+    def get_by_long_id(self, long_cid: str) -> Optional[StormRecord]:
+        """Find a storm by its long ATCF ID (e.g. AL012024)."""
+        return self._by_long_cid.get(long_cid.upper())
+
+    def get_by_name(self, name: str) -> Optional[StormRecord]:
+        """Find a storm by its name."""
+        return self._by_name.get(name.upper())
+
+    def find(self, *, name="", cid="") -> Optional[StormRecord]:
+        """Find a storm by name or short ID. name has priority over cid."""
+        record = None
+        if name:
+            record = self.get_by_name(name)
+        if record is None and cid:
+            record = self.get(cid)
+        return record
+
+    def ids(self) -> List[str]:
+        """Get the list of short IDs."""
+        return [record.cid for record in self._records]
+
+    def names(self) -> List[str]:
+        """Get the list of names."""
+        return [record.name for record in self._records]
+
+
+_snapshot = StormTable()
+# whether the data cached on disk was loaded (or replaced by newer data)
+_loaded = False
+_lock = threading.RLock()
+# validators from the last response of the ATCF source
+_validators: Dict[str, str] = {}
+# the download currently in progress, shared by all concurrent callers
+_inflight: "Optional[asyncio.Task[bool]]" = None
+# monotonic time of the last successful download
+_last_fetch = -math.inf
+
+
+def snapshot() -> StormTable:
+    """Get the current snapshot of active storms.
+
+    Hold on to the returned object for as long as you need consistent data;
+    it will not change even if new data is published in the meantime.
+    Data cached on disk is loaded the first time this is called, unless
+    warm_up() or load() was called before.
+    """
+    if not _loaded:
+        _ensure_loaded()
+    return _snapshot
+
+
+def _publish(
+    records: Iterable[StormRecord], digest: Optional[str] = None
+) -> StormTable:
+    """(Internal) Build a snapshot off to the side and make it current."""
+    global _snapshot, _loaded
+    with _lock:
+        new = StormTable(records, version=_snapshot.version + 1, digest=digest)
+        # a single reference swap; readers see either the old or the new
+        # snapshot
+        _snapshot = new
+        _loaded = True
+    return new
+
+
+class ChangeKind(enum.Enum):
+    """Kinds of changes between two snapshots. See diff()."""
+
+    FORMED = "formed"
+    UPDATED = "updated"
+    INTENSITY = "intensity"
+    RECLASSIFIED = "reclassified"
+    RENAMED = "renamed"
+    DISSIPATED = "dissipated"
+
+
+@dataclass(frozen=True)
+class StormChange:
+    """A change to a single storm between two snapshots.
+
+    Attributes:
+    kind -- the kind of change
+    old -- the storm in the old snapshot (None if it formed)
+    new -- the storm in the new snapshot (None if it dissipated)
+    """
+
+    kind: ChangeKind
+    old: Optional[StormRecord]
+    new: Optional[StormRecord]
+
+    @property
+    def cid(self) -> str:
+        """Short ID of the storm as it is now (or was, if it dissipated)."""
+        return self.old.cid if self.new is None else self.new.cid
+
+
+def _distance(a: StormRecord, b: StormRecord) -> float:
+    """(Internal) Rough distance between two storms in degrees."""
+    dlon = abs(a.lon - b.lon) % 360
+    return math.hypot(a.lat - b.lat, min(dlon, 360 - dlon))
+
+
+def _compare(old: StormRecord, new: StormRecord, changes: List[StormChange]):
+    """(Internal) Compare two records of the same storm."""
+    if new.timestamp > old.timestamp:
+        changes.append(StormChange(ChangeKind.UPDATED, old, new))
+    if new.wind != old.wind:
+        changes.append(StormChange(ChangeKind.INTENSITY, old, new))
+    if new.tc_class != old.tc_class:
+        changes.append(StormChange(ChangeKind.RECLASSIFIED, old, new))
+
+
+def diff(old: StormTable, new: StormTable) -> List[StormChange]:
+    """Compare two snapshots and return the list of changes.
+
+    Storms are matched by short ID. A storm can have more than one change:
+    UPDATED -- the storm has a newer fix
+    INTENSITY -- the storm's winds changed
+    RECLASSIFIED -- the storm's ATCF classification changed
+    RENAMED -- the storm got a name, or an invest became a numbered storm
+    An invest that disappears at the same time a numbered storm forms nearby
+    in the same basin (see RENAME_DISTANCE) is reported as RENAMED rather than
+    DISSIPATED and FORMED. All other storms that only exist in one of the
+    snapshots are reported as FORMED or DISSIPATED.
+    Storms that didn't change are not reported at all.
+    """
+    changes: List[StormChange] = []
+    formed = [storm for storm in new if storm.cid not in old]
+    gone = [storm for storm in old if storm.cid not in new]
+    for storm in new:
+        prev = old.get(storm.cid)
+        if prev is None:
+            continue
+        if storm.name != prev.name:
+            changes.append(StormChange(ChangeKind.RENAMED, prev, storm))
+        _compare(prev, storm, changes)
+    for storm in formed:
+        if storm.name != "INVEST":
+            invests = [
+                invest
+                for invest in gone
+                if invest.name == "INVEST"
+                and invest.basin == storm.basin
+                and _distance(invest, storm) <= RENAME_DISTANCE
+            ]
+            if invests:
+                prev = min(invests, key=lambda invest: _distance(invest, storm))
+                gone.remove(prev)
+                changes.append(StormChange(ChangeKind.RENAMED, prev, storm))
+                _compare(prev, storm, changes)
+                continue
+        changes.append(StormChange(ChangeKind.FORMED, None, storm))
+    for storm in gone:
+        changes.append(StormChange(ChangeKind.DISSIPATED, storm, None))
+    return changes
+
+
 async def main():
     print("CycloMonitor ATCF Module")
     print("CLI coming soon")
 
 
 def reset():
-    """Reset ATCF data."""
-    cyclones.clear()
-    names.clear()
-    timestamps.clear()
-    lats.clear()
-    longs.clear()
-    basins.clear()
-    winds.clear()
-    pressures.clear()
-    tc_classes.clear()
-    lats_real.clear()
-    longs_real.clear()
-    movement_speeds.clear()
-    movement_dirs.clear()
-    long_cids.clear()
-
-
-def parse_storm(line: str, *, mode="std"):
-    """Parse ATCF data.
+    """Reset ATCF data by publishing an empty snapshot."""
+    global _last_fetch
+    _last_fetch = -math.inf
+    _validators.clear()
+    _publish(())
+
+
+def _digest(atcf_text: str, interp_text: str) -> str:
+    """(Internal) Hash the contents of both sector files."""
+    h = hashlib.sha256(atcf_text.encode())
+    h.update(b"\0")
+    h.update(interp_text.encode())
+    return h.hexdigest()
+
 
+def _parse_coord(coord: str) -> float:
+    """Convert a coordinate such as 12.3N or 45.6W to a float."""
+    hemisphere = coord[-1]
+    value = float(coord[:-1])
+    if hemisphere == "S" or hemisphere == "W":
+        return -value
+    if hemisphere == "N" or hemisphere == "E":
+        return value
+    raise ValueError(coord)
+
+
+def parse_storm(line: str, *, mode="std", record: Optional[StormRecord] = None):
+    """Parse a single line of ATCF data. Returns a StormRecord.
+
+    To parse a whole sector file, parse_sector() is much faster.
     Arguments:
     line -- the data to be parsed
     Keyword arguments:
     mode -- parsing mode (default "std")
+    record -- the StormRecord to complete (only used in interp mode)
     If mode is "interp", parse extra data provided in ATCF's
-    interp_sector_file.
+    interp_sector_file and store it in record.
     """
     log.debug(ATCF_PARSE_STORM.format(line, mode))
     storm = line.split()
@@ -111,208 +479,596 @@ def parse_storm(line: str, *, mode="std"):
         else:
             assert len(storm) == 9, ATCF_ERROR_COL.format(9, mode, len(storm))
         if not mode == "interp":
-            cyclones.append(storm[0])
-            names.append(storm[1])
             time = storm[2] + storm[3]
             # convert the timestamp from the given data to Unix time
             timestamp = datetime.datetime.strptime(time, "%y%m%d%H%M")
             timestamp = timestamp.replace(tzinfo=datetime.UTC)
-            utc_time = int(timestamp.timestamp())
-            timestamps.append(utc_time)
-            lats.append(storm[4])
-            longs.append(storm[5])
-            basins.append(storm[6])
-            winds.append(int(storm[7]))
-            pressures.append(int(storm[8]))
-        else:
-            lats_real.append(float(storm[4]))
-            longs_real.append(float(storm[5]))
-            tc_classes.append(storm[7])
-            movement_speeds.append(float(storm[10]))
-            movement_dirs.append(float(storm[11]))
-            long_cids.append(storm[0])
-    except (AssertionError, LookupError, ValueError) as e:
-        # remove the faulty entry
-        faulty_entry = len(cyclones) - 1
-        for index, (cy, n, ts, lat, lon, b, w, p) in enumerate(
-            zip_longest(
-                cyclones, names, timestamps, lats, longs, basins, winds, pressures
+            return StormRecord(
+                storm[0],
+                storm[1],
+                int(timestamp.timestamp()),
+                _parse_coord(storm[4]),
+                _parse_coord(storm[5]),
+                storm[6],
+                int(storm[7]),
+                int(storm[8]),
             )
-        ):
-            if index == faulty_entry:
-                if cy is not None:
-                    cyclones.remove(cy)
-                if n is not None:
-                    names.remove(n)
-                if ts is not None:
-                    timestamps.remove(ts)
-                if lat is not None:
-                    lats.remove(lat)
-                if lon is not None:
-                    longs.remove(lon)
-                if b is not None:
-                    basins.remove(b)
-                if w is not None:
-                    winds.remove(w)
-                if p is not None:
-                    pressures.remove(p)
+        # parse everything before touching the record so that a bad line
+        # never leaves it half-filled
+        lat_real = float(storm[4])
+        lon_real = float(storm[5])
+        movement_speed = float(storm[10])
+        movement_dir = float(storm[11])
+        record.tc_class = storm[7]
+        record.lat_real = lat_real
+        record.lon_real = lon_real
+        record.movement_speed = movement_speed
+        record.movement_dir = movement_dir
+        record.long_cid = storm[0]
+        return record
+    except (AssertionError, LookupError, ValueError, AttributeError) as e:
+        log.exception(ATCF_WRONG_DATA.format(line))
+        raise WrongData(ATCF_WRONG_DATA.format(line)) from e
 
-        if mode == "interp":
-            for index, (la, lo, c, ms, md) in enumerate(
-                zip_longest(
-                    lats_real, longs_real, tc_classes, movement_speeds, movement_dirs
+
+class InterpRow(NamedTuple):
+    """A validated row of ATCF's interp_sector_file.
+
+    key is the short ID of the storm the row belongs to (e.g. 01L).
+    """
+
+    key: str
+    long_cid: str
+    tc_class: str
+    lat_real: float
+    lon_real: float
+    movement_speed: float
+    movement_dir: float
+
+
+_EPOCH_ORDINAL = datetime.date(1970, 1, 1).toordinal()
+
+
+@functools.lru_cache(maxsize=1024)
+def _decode_date(date: str) -> int:
+    """(Internal) Convert a YYMMDD date to Unix time at midnight UTC."""
+    if len(date) != 6 or not date.isdigit():
+        raise ValueError(date)
+    year = int(date[:2])
+    # same pivot as strptime's %y
+    year += 2000 if year < 69 else 1900
+    return (
+        datetime.date(year, int(date[2:4]), int(date[4:])).toordinal() - _EPOCH_ORDINAL
+    ) * 86400
+
+
+def _decode_time(date: str, hhmm: str) -> int:
+    """(Internal) Convert a YYMMDD date and an HHMM time to Unix time."""
+    if len(hhmm) != 4 or not hhmm.isdigit():
+        raise ValueError(hhmm)
+    hour = int(hhmm[:2])
+    minute = int(hhmm[2:])
+    if hour > 23 or minute > 59:
+        raise ValueError(hhmm)
+    return _decode_date(date) + hour * 3600 + minute * 60
+
+
+def parse_sector(text: str, *, mode="std") -> list:
+    """Parse a whole sector file in one pass.
+
+    Returns a list of StormRecords, or a list of InterpRows if mode is
+    "interp". A row is either parsed completely or skipped; a warning is
+    logged for every row that is skipped.
+
+    Arguments:
+    text -- the contents of atcf_sector_file or interp_sector_file
+    Keyword arguments:
+    mode -- parsing mode (default "std")
+    """
+    lines = text.splitlines()
+    log.debug(ATCF_PARSE_SECTOR.format(len(lines), mode))
+    interp = mode == "interp"
+    columns = 12 if interp else 9
+    parsed = []
+    append = parsed.append
+    for line in lines:
+        fields = line.split()
+        if not fields:
+            continue
+        if len(fields) != columns:
+            log.warning(ATCF_WRONG_DATA.format(line))
+            continue
+        try:
+            if interp:
+                row = InterpRow(
+                    fields[0][2:4] + fields[6],
+                    fields[0],
+                    fields[7],
+                    float(fields[4]),
+                    float(fields[5]),
+                    float(fields[10]),
+                    float(fields[11]),
                 )
-            ):
-                if index == faulty_entry:
-                    if la is not None:
-                        lats_real.remove(la)
-                    if lo is not None:
-                        longs_real.remove(lo)
-                    if c is not None:
-                        tc_classes.remove(c)
-                    if ms is not None:
-                        movement_speeds.remove(ms)
-                    if md is not None:
-                        movement_dirs.remove(md)
+            else:
+                row = StormRecord(
+                    fields[0],
+                    fields[1],
+                    _decode_time(fields[2], fields[3]),
+                    _parse_coord(fields[4]),
+                    _parse_coord(fields[5]),
+                    fields[6],
+                    int(fields[7]),
+                    int(fields[8]),
+                )
+        except ValueError:
+            log.warning(ATCF_WRONG_DATA.format(line))
+            continue
+        append(row)
+    return parsed
 
-        log.exception(ATCF_WRONG_DATA.format(line))
-        raise WrongData(ATCF_WRONG_DATA.format(line)) from e
 
+def _join(records: List[StormRecord], rows: List[InterpRow]) -> List[StormRecord]:
+    """(Internal) Fill in records with their interp data.
+
+    Records without interp data are kept; their interp fields stay None.
+    """
+    # like StormTable, which keeps the last record for each short ID, the
+    # last row for a storm wins, so that a storm's fix and interp data come
+    # from the same rows
+    index: Dict[str, InterpRow] = {row.key: row for row in rows}
+    for record in records:
+        row = index.get(record.cid)
+        if row is None:
+            log.warning(ATCF_NO_INTERP.format(record.cid))
+            continue
+        record.tc_class = row.tc_class
+        record.lat_real = row.lat_real
+        record.lon_real = row.lon_real
+        record.movement_speed = row.movement_speed
+        record.movement_dir = row.movement_dir
+        record.long_cid = row.long_cid
+    return records
+
+
+def _write_cache(records: Iterable[StormRecord], digest: Optional[str]):
+    """(Internal) Save records to SNAPSHOT_FILE."""
+    data = marshal.dumps(
+        (
+            SNAPSHOT_FORMAT,
+            digest,
+            [tuple(getattr(r, a) for a in StormRecord.__slots__) for r in records],
+        )
+    )
+    # write to a temporary file first so that a crash can't leave a
+    # half-written cache behind
+    with open(f"{SNAPSHOT_FILE}.tmp", "wb") as f:
+        f.write(data)
+    os.replace(f"{SNAPSHOT_FILE}.tmp", SNAPSHOT_FILE)
+
+
+def _read_cache() -> Optional[Tuple[List[StormRecord], Optional[str]]]:
+    """(Internal) Read records saved on disk.
+
+    SNAPSHOT_FILE is tried first. If it is missing or unreadable, the sector
+    files are parsed instead and SNAPSHOT_FILE is rewritten.
+    Returns None if there is no data on disk.
+    """
+    try:
+        with open(SNAPSHOT_FILE, "rb") as f:
+            fmt, digest, rows = marshal.loads(f.read())
+        if fmt != SNAPSHOT_FORMAT:
+            raise ValueError(fmt)
+        return [StormRecord(*row) for row in rows], digest
+    except FileNotFoundError:
+        pass
+    except Exception:
+        log.warning(ATCF_BAD_SNAPSHOT_FILE.format(SNAPSHOT_FILE), exc_info=True)
 
-# Do NOT make this function a coroutine.
-def load():
-    """Load ATCF data saved on disk."""
     try:
         with open("atcf_sector_file", "r") as file:
-            for line in file:
-                try:
-                    parse_storm(line)
-                except WrongData:
-                    continue
+            atcf_text = file.read()
     except FileNotFoundError:
         log.info(ATCF_NO_DATA)
-        return
+        return None
 
     try:
         with open("interp_sector_file", "r") as file:
-            storms = []
-            for line in file:
-                storms.append(line.split())
-            for tc in cyclones:
-                for storm in storms:
-                    # sort interp data
-                    cid = storm[0][2] + storm[0][3] + storm[6]
-                    if cid == tc:
-                        lats_real.append(float(storm[4]))
-                        longs_real.append(float(storm[5]))
-                        tc_classes.append(storm[7])
-                        movement_speeds.append(float(storm[10]))
-                        movement_dirs.append(float(storm[11]))
-                        long_cids.append(storm[0])
-                        break
-                else:  # no break
-                    raise ATCFError(ERROR_HDYGH)
+            interp_text = file.read()
     except Exception as e:
         raise ATCFError(ATCF_GET_INTERP_FAILED) from e
+    records = _join(parse_sector(atcf_text), parse_sector(interp_text, mode="interp"))
+    digest = _digest(atcf_text, interp_text)
+    try:
+        _write_cache(records, digest)
+    except OSError:
+        log.warning(ATCF_BAD_SNAPSHOT_FILE.format(SNAPSHOT_FILE), exc_info=True)
+    return records, digest
+
+
+# Do NOT make this function a coroutine.
+def load():
+    """Load ATCF data saved on disk and publish it."""
+    cached = _read_cache()
+    if cached is not None:
+        _publish(*cached)
+
+
+def _ensure_loaded():
+    """(Internal) Load ATCF data saved on disk unless it was already loaded.
+
+    Never raises; if the data on disk is unusable, it is logged and ignored.
+    """
+    global _loaded
+    if _loaded:
+        return
+    try:
+        cached = _read_cache()
+    except Exception:
+        log.exception(ATCF_LOAD_FAILED)
+        cached = None
+    with _lock:
+        # something else may have published data while we were reading
+        if _loaded:
+            return
+        if cached is not None:
+            _publish(*cached)
+        _loaded = True
+
+
+async def warm_up():
+    """Load ATCF data saved on disk without blocking the event loop."""
+    if not _loaded:
+        await asyncio.get_running_loop().run_in_executor(None, _ensure_loaded)
 
 
-# load cached data upon bringing in the module
-load()
+async def get_data_alt(*, max_age: Optional[float] = None) -> bool:
+    """Download ATCF data (alt source) and publish a new snapshot.
+
+    The current snapshot stays available until the new one is ready.
+    Returns True if new data was published, or False if the data is
+    unchanged since the last download, in which case nothing is written to
+    disk or parsed.
+    Concurrent callers share a single download and its result. If the last
+    download finished less than max_age seconds ago (default REFRESH_WINDOW),
+    nothing is downloaded and False is returned.
+
+    Keyword arguments:
+    max_age -- how old the current data may be, in seconds
+    """
+    global _inflight
+    if max_age is None:
+        max_age = REFRESH_WINDOW
+    task = _inflight
+    if task is None or task.done() or task.get_loop() is not asyncio.get_running_loop():
+        if time.monotonic() - _last_fetch < max_age:
+            log.debug(ATCF_FRESH.format(max_age))
+            return False
+        task = asyncio.ensure_future(_fetch())
+        _inflight = task
+    else:
+        log.debug(ATCF_JOINING_DOWNLOAD)
+    # shield the download so that one cancelled caller doesn't cancel it
+    # for everybody else
+    return await asyncio.shield(task)
 
 
-async def get_data_alt():
-    """Download ATCF data (alt source)."""
-    global cyclones, names, timestamps, lats, longs, basins, winds, pressures
-    global tc_classes, lats_real, longs_real, movement_speeds, movement_dirs
-    reset()
+async def _fetch() -> bool:
+    """(Internal) Download ATCF data. See get_data_alt()."""
+    global _last_fetch
     log.info(ATCF_USING_ALT)
-    async with aiohttp.ClientSession(
-        timeout=aiohttp.ClientTimeout(connect=10), raise_for_status=True
-    ) as session:
-        try:
-            async with session.get(URL) as r:
-                tc_list = await r.json()
-        except asyncio.TimeoutError as e:
-            raise ATCFError(ERROR_TIMED_OUT) from e
-        except aiohttp.ClientError as exc:
-            raise ATCFError(ERROR_ATCF_GET_DATA_FAILED) from exc
+    headers = {}
+    if "etag" in _validators:
+        headers["If-None-Match"] = _validators["etag"]
+    if "last_modified" in _validators:
+        headers["If-Modified-Since"] = _validators["last_modified"]
+    session = await http_client.get_session()
+    try:
+        async with session.get(URL, headers=headers) as r:
+            if r.status == 304:
+                _last_fetch = time.monotonic()
+                log.info(ATCF_UNCHANGED)
+                return False
+            tc_list = await r.json()
+            etag = r.headers.get("ETag")
+            last_modified = r.headers.get("Last-Modified")
+    except asyncio.TimeoutError as e:
+        raise ATCFError(ERROR_TIMED_OUT) from e
+    except aiohttp.ClientError as exc:
+        raise ATCFError(ERROR_ATCF_GET_DATA_FAILED) from exc
+
+    _validators.clear()
+    if etag is not None:
+        _validators["etag"] = etag
+    if last_modified is not None:
+        _validators["last_modified"] = last_modified
+    atcf_text = "".join(d["atcf_sector_file"] + "\n" for d in tc_list)
+    interp_text = "".join(d["interp_sector_file"] + "\n" for d in tc_list)
+    digest = _digest(atcf_text, interp_text)
+    if digest == snapshot().digest:
+        _last_fetch = time.monotonic()
+        log.info(ATCF_UNCHANGED)
+        return False
 
     async with aiofiles.open("atcf_sector_file", "w") as f:
-        for d in tc_list:
-            await f.write(d["atcf_sector_file"] + "\n")
+        await f.write(atcf_text)
 
     async with aiofiles.open("interp_sector_file", "w") as f:
-        for d in tc_list:
-            await f.write(d["interp_sector_file"] + "\n")
+        await f.write(interp_text)
 
-    for d in tc_list:
-        try:
-            parse_storm(d["atcf_sector_file"])
-            parse_storm(d["interp_sector_file"], mode="interp")
-        except WrongData:
-            continue
+    records = _join(parse_sector(atcf_text), parse_sector(interp_text, mode="interp"))
+    _publish(records, digest)
+    _last_fetch = time.monotonic()
+    try:
+        await asyncio.get_running_loop().run_in_executor(
+            None, _write_cache, records, digest
+        )
+    except OSError:
+        log.warning(ATCF_BAD_SNAPSHOT_FILE.format(SNAPSHOT_FILE), exc_info=True)
+    return True
 
 
 # Alias of get_data_alt for compatibility reasons
 get_data = get_data_alt
 
 
-async def get_forecast(*, name="", cid="", use_exper=False):
-    """Download the official forecast image for an active TC.
-    Returns the extension of the downloaded image file.
+@dataclass(frozen=True)
+class ForecastImage:
+    """A forecast image for a single advisory.
+
+    Attributes:
+    atcf_id -- the storm's long ATCF ID
+    product -- "cone", "exp_cone" (NHC) or "jtwc"
+    advisory -- time of the fix the image belongs to in Unix time
+    ext -- the image's file extension (png or gif)
+    data -- the image itself
+    etag -- ETag sent by the server, if any
+    last_modified -- Last-Modified sent by the server, if any
+    checked -- when the image was last downloaded or revalidated in Unix time
+    """
+
+    atcf_id: str
+    product: str
+    advisory: int
+    ext: str
+    data: bytes = field(repr=False)
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    checked: float = 0.0
+
+    @property
+    def key(self) -> Tuple[str, str, int]:
+        return self.atcf_id, self.product, self.advisory
+
+    @property
+    def filename(self) -> str:
+        return f"{_forecast_stem(self.key)}.{self.ext}"
+
+    @property
+    def path(self) -> str:
+        """Where the image is cached on disk."""
+        return os.path.join(FORECAST_CACHE_DIR, self.filename)
+
+
+# most recently used images are at the end
+_forecasts: "OrderedDict[Tuple[str, str, int], ForecastImage]" = OrderedDict()
+_forecast_bytes = 0
+_forecast_inflight: Dict[Tuple[str, str, int], asyncio.Future] = {}
+
+
+def _forecast_stem(key: Tuple[str, str, int]) -> str:
+    atcf_id, product, advisory = key
+    return f"{atcf_id}_{product}_{advisory}"
+
+
+def _is_fresh(image: ForecastImage) -> bool:
+    return time.time() - image.checked < FORECAST_MAX_AGE
+
+
+def _remember_forecast(image: ForecastImage):
+    """(Internal) Put an image in the memory cache, evicting the least
+    recently used images if it gets too big.
+    """
+    global _forecast_bytes
+    old = _forecasts.pop(image.key, None)
+    if old is not None:
+        _forecast_bytes -= len(old.data)
+    _forecasts[image.key] = image
+    _forecast_bytes += len(image.data)
+    # never evict the image that was just added
+    while _forecast_bytes > FORECAST_MEMORY_LIMIT and len(_forecasts) > 1:
+        _, evicted = _forecasts.popitem(last=False)
+        _forecast_bytes -= len(evicted.data)
+
+
+def _read_forecast_file(key: Tuple[str, str, int]) -> Optional[ForecastImage]:
+    """(Internal) Read a cached image from disk. Returns None if it isn't
+    there or can't be used.
+    """
+    stem = os.path.join(FORECAST_CACHE_DIR, _forecast_stem(key))
+    try:
+        with open(f"{stem}.json", "r") as f:
+            meta = json.load(f)
+        with open(f"{stem}.{meta['ext']}", "rb") as f:
+            data = f.read()
+        return ForecastImage(
+            *key,
+            meta["ext"],
+            data,
+            meta["etag"],
+            meta["last_modified"],
+            meta["checked"],
+        )
+    except FileNotFoundError:
+        return None
+    except Exception:
+        log.warning(ATCF_BAD_FORECAST_FILE.format(stem), exc_info=True)
+        return None
+
+
+def _write_forecast_file(image: ForecastImage):
+    """(Internal) Save an image to disk and prune the disk cache."""
+    os.makedirs(FORECAST_CACHE_DIR, exist_ok=True)
+    stem = os.path.join(FORECAST_CACHE_DIR, _forecast_stem(image.key))
+    # the image is written before its metadata, so that metadata never
+    # points to a half-written image
+    with open(f"{image.path}.tmp", "wb") as f:
+        f.write(image.data)
+    os.replace(f"{image.path}.tmp", image.path)
+    meta = {
+        "ext": image.ext,
+        "etag": image.etag,
+        "last_modified": image.last_modified,
+        "checked": image.checked,
+    }
+    with open(f"{stem}.json.tmp", "w") as f:
+        json.dump(meta, f)
+    os.replace(f"{stem}.json.tmp", f"{stem}.json")
+    _prune_forecast_files(keep=_forecast_stem(image.key))
+
+
+def _prune_forecast_files(*, keep: str):
+    """(Internal) Delete the least recently written images on disk until
+    they fit in FORECAST_DISK_LIMIT.
+    """
+    entries: Dict[str, List] = {}  # stem -> [mtime, size, paths]
+    with os.scandir(FORECAST_CACHE_DIR) as it:
+        for entry in it:
+            stem = entry.name.split(".", 1)[0]
+            stat = entry.stat()
+            info = entries.setdefault(stem, [0.0, 0, []])
+            info[0] = max(info[0], stat.st_mtime)
+            info[1] += stat.st_size
+            info[2].append(entry.path)
+    total = sum(info[1] for info in entries.values())
+    for stem, (_, size, paths) in sorted(entries.items(), key=lambda e: e[1][0]):
+        if total <= FORECAST_DISK_LIMIT:
+            break
+        if stem == keep:
+            continue
+        for path in paths:
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+        total -= size
+
+
+async def _load_forecast(
+    key: Tuple[str, str, int], url: str, cached: Optional[ForecastImage]
+) -> ForecastImage:
+    """(Internal) Get an image from disk or from the server. See get_forecast()."""
+    loop = asyncio.get_running_loop()
+    if cached is None:
+        cached = await loop.run_in_executor(None, _read_forecast_file, key)
+        if cached is not None and _is_fresh(cached):
+            _remember_forecast(cached)
+            return cached
+
+    headers = {}
+    if cached is not None:
+        if cached.etag is not None:
+            headers["If-None-Match"] = cached.etag
+        if cached.last_modified is not None:
+            headers["If-Modified-Since"] = cached.last_modified
+    session = await http_client.get_session()
+    try:
+        async with session.get(url, headers=headers) as r:
+            if r.status == 304:
+                image = replace(cached, checked=time.time())
+            else:
+                image = ForecastImage(
+                    *key,
+                    # assuming everything is good, this will either be png or gif
+                    r.content_type.split("/")[1],
+                    await r.read(),
+                    r.headers.get("ETag"),
+                    r.headers.get("Last-Modified"),
+                    time.time(),
+                )
+    except (asyncio.TimeoutError, aiohttp.ClientError) as exc:
+        if cached is None:
+            if isinstance(exc, asyncio.TimeoutError):
+                raise ATCFError(ERROR_TIMED_OUT) from exc
+            raise ATCFError(ERROR_GET_FORECAST_FAILED) from exc
+        # an old image is better than no image at all
+        log.warning(ATCF_FORECAST_STALE.format(cached.filename), exc_info=True)
+        image = cached
+
+    _remember_forecast(image)
+    try:
+        await loop.run_in_executor(None, _write_forecast_file, image)
+    except OSError:
+        log.warning(ATCF_BAD_FORECAST_FILE.format(image.path), exc_info=True)
+    return image
+
+
+async def get_forecast(*, name="", cid="", use_exper=False) -> Optional[ForecastImage]:
+    """Get the official forecast image for an active TC.
+    Returns a ForecastImage, or None if the storm can't be found.
+
+    Images are cached in memory and in FORECAST_CACHE_DIR for each storm,
+    product and advisory, and revalidated with the server once they are
+    older than FORECAST_MAX_AGE seconds. Concurrent callers asking for the
+    same image share a single download.
 
     Keyword arguments:
     name -- Search by name
     cid -- Search by identifier
     You must specify either name or cid. name has priority over cid.
     """
-    if not (cyclones and names):
+    storms = snapshot()
+    if not storms:
         raise NoActiveStorms()
     if not (name or cid):
         raise ValueError(ERROR_GET_FORECAST_NO_PARAMS)
-    if name:
-        name = name.upper()
-        try:
-            index = names.index(name)
-        except ValueError:
-            index = -1
-    else:
-        index = -1
-    if index == -1 or not name:
-        try:
-            index = cyclones.index(cid)
-        except ValueError:
-            return None
+    storm = storms.find(name=name, cid=cid)
+    if storm is None:
+        return None
 
-    basin = basins[index][:2]  # 2-char basin identifier
-    num = cyclones[index][:2]  # 2-digit storm number
-    jtwc_year = long_cids[index][6:]  # Last 2 digits of the year
-    atcf_id = long_cids[index].upper()
+    basin = storm.basin[:2]  # 2-char basin identifier
+    num = storm.cid[:2]  # 2-digit storm number
+    atcf_id = storm.atcf_id
+    jtwc_year = atcf_id[6:]  # Last 2 digits of the year
     if basin == "AT" or basin == "EP" or basin == "CP":
         nhc_basin = basin
     else:
         nhc_basin = None
 
-    async with aiohttp.ClientSession(
-        timeout=aiohttp.ClientTimeout(connect=10), raise_for_status=True
-    ) as session:
-        if nhc_basin is not None:
-            nhc_id = f"{nhc_basin}{num}"
-            if use_exper:
-                coro = session.get(BASE_URL_NHC_EXPER.format(nhc_id, atcf_id))
-            else:
-                coro = session.get(BASE_URL_NHC.format(nhc_id, atcf_id))
+    if nhc_basin is not None:
+        nhc_id = f"{nhc_basin}{num}"
+        if use_exper:
+            product = "exp_cone"
+            url = BASE_URL_NHC_EXPER.format(nhc_id, atcf_id)
         else:
-            basin = basin.lower()
-            jtwc_id = f"{basin}{num}{jtwc_year}"
-            coro = session.get(BASE_URL_JTWC.format(jtwc_id))
-
-        async with coro as r:
-            # assuming everything is good, this will either be png or gif
-            ext = r.content_type.split("/")[1]
-            async with aiofiles.open(f"forecast.{ext}", "wb") as img:
-                await img.write(await r.read())
-    return ext
+            product = "cone"
+            url = BASE_URL_NHC.format(nhc_id, atcf_id)
+    else:
+        basin = basin.lower()
+        jtwc_id = f"{basin}{num}{jtwc_year}"
+        product = "jtwc"
+        url = BASE_URL_JTWC.format(jtwc_id)
+
+    key = (atcf_id, product, storm.timestamp)
+    image = _forecasts.get(key)
+    if image is not None and _is_fresh(image):
+        _forecasts.move_to_end(key)
+        return image
+
+    task = _forecast_inflight.get(key)
+    if task is None or task.done() or task.get_loop() is not asyncio.get_running_loop():
+        task = asyncio.ensure_future(_load_forecast(key, url, image))
+        _forecast_inflight[key] = task
+        task.add_done_callback(lambda t: _forget_forecast_task(key, t))
+    else:
+        log.debug(ATCF_JOINING_FORECAST.format(_forecast_stem(key)))
+    # shield the download so that one cancelled caller doesn't cancel it
+    # for everybody else
+    return await asyncio.shield(task)
+
+
+def _forget_forecast_task(key: Tuple[str, str, int], task: asyncio.Future):
+    if _forecast_inflight.get(key) is task:
+        del _forecast_inflight[key]
 
 
 if __name__ == "__main__":
@@ -6,6 +6,8 @@ import re
 from sys import exit, version_info, stdin, stdout, stderr
 from .atcf import *
 from . import errors
+from . import http_client
+from . import ibtracs
 from .ibtracs import *
 from . import locales
 from .dir_calc import get_dir
@@ -35,23 +37,30 @@ KT_TO_KMH = 1.852
 # fmt: off
 # Attributes that probably shouldn't be accessed from the CLI
 PRIVATE_ATTRS = {
-    "zip_longest", "ATCFError", "WrongData", "NoActiveStorms", "main",
+    "StormRecord", "StormTable", "StormChange", "ChangeKind", "ATCFError",
+    "WrongData", "NoActiveStorms", "InterpRow", "NamedTuple", "ForecastImage",
+    "OrderedDict", "field", "replace",
+    "main", "Dict", "Iterator", "List", "Optional",
     "dataclass", "Iterable", "Storm", "Query", "query_group", "varchar",
     "numeric", "bit", "StringIO", "Callable", "Awaitable", "Generator",
     "Internal", "PRIVATE_ATTRS", "log", "asyncio", "datetime", "logging",
     "aiohttp", "json", "sqlite3", "subprocess", "io", "re", "version_info",
-    "Literal", "Tuple", "isatty",
+    "Literal", "Tuple", "isatty", "http_client", "_closing_session",
+    "contextmanager", "ThreadPoolExecutor", "ContextVar", "Executor",
+    "ProcessPoolExecutor", "Page", "Future", "asynccontextmanager", "Set",
 }
 PRIVATE_ATTRS.update(
     attr for attr in dir() if not isinstance(globals()[attr], Callable)
 )
+# type hints imported by the star imports
+PRIVATE_ATTRS.update(
+    attr for attr in dir() if getattr(globals()[attr], "__module__", None) == "typing"
+)
 PRIVATE_ATTRS.remove("KT_TO_MPH")
 PRIVATE_ATTRS.remove("KT_TO_KMH")
 CONSTANTS = {
     "CONSTANTS", "PRIVATE_ATTRS", "COPYRIGHT_NOTICE", "KT_TO_MPH", "KT_TO_KMH",
-    "cyclones", "names", "timestamps", "lats", "longs", "basins", "winds",
-    "pressures", "tc_classes", "lats_real", "longs_real", "movement_speeds",
-    "movement_dirs", "None", "True", "False",
+    "None", "True", "False",
 }
 log = logging.getLogger(__name__)
 cd = chdir
@@ -128,7 +137,7 @@ class Internal:
 
                 if isinstance(out, Awaitable):
                     try:
-                        out = asyncio.run(out)
+                        out = asyncio.run(_closing_session(out))
                     except Exception as e:
                         if e.args:
                             return f"{type(e).__name__}: {e}"
@@ -214,6 +223,15 @@ class Internal:
         return tc_class
 
 
+async def _closing_session(coro: Awaitable):
+    # every command runs in its own event loop, and the shared HTTP session
+    # can't outlive the loop it was made in
+    try:
+        return await coro
+    finally:
+        await http_client.close()
+
+
 def echo(*args):
     """Print a string to the screen."""
     return " ".join(args)
@@ -288,7 +306,7 @@ def active_storms(*args):
     """Get the list of active storms.
     Format is ID NAME.
     """
-    return (f"{id} {name}" for id, name in zip(cyclones, names))
+    return (f"{storm.cid} {storm.name}" for storm in snapshot())
 
 
 def present(name_or_id: str):
@@ -297,26 +315,22 @@ def present(name_or_id: str):
     Parameters:
     name_or_id - The TC name or identifier.
     """
-    if not (cyclones and names):
+    storms = snapshot()
+    if not storms:
         raise NoActiveStorms
     name_or_id = name_or_id.upper()
-    if name_or_id in names:
-        name = name_or_id
-        index = names.index(name_or_id)
-        id = cyclones[index]
-    elif name_or_id in cyclones:
-        id = name_or_id
-        index = cyclones.index(name_or_id)
-        name = names[index]
-    else:
+    storm = storms.find(name=name_or_id, cid=name_or_id)
+    if storm is None:
         raise ValueError(CLI_STORM_NOT_FOUND.format(name_or_id))
+    id = storm.cid
+    name = storm.name
 
-    tc_class = tc_classes[index]
-    wind = winds[index]
-    basin = basins[index]
+    tc_class = storm.tc_class
+    wind = storm.wind
+    basin = storm.basin
     tc_class = Internal.get_nature_name(name, wind, tc_class, basin)
     timestamp = (
-        datetime.datetime.fromtimestamp(timestamps[index])
+        datetime.datetime.fromtimestamp(storm.timestamp)
         .replace(tzinfo=datetime.timezone.utc)
         .isoformat()
     )
@@ -324,13 +338,16 @@ def present(name_or_id: str):
         name = display_name = id
     else:
         display_name = f"{id} ({name})"
-    lat = lats[index]
-    long = longs[index]
+    lat = storm.lat_str
+    long = storm.lon_str
     mph = round(wind * KT_TO_MPH / 5) * 5
     kmh = round(wind * KT_TO_KMH / 5) * 5
-    pres = pressures[index]
-    movement_speed = movement_speeds[index]
-    movement_dir = get_dir(movement_dirs[index])
+    pres = storm.pressure
+    movement_speed = storm.movement_speed
+    if storm.movement_dir is None or movement_speed is None:
+        movement_dir = ""
+    else:
+        movement_dir = get_dir(storm.movement_dir)
     if (not movement_dir) or (movement_speed) < 0:
         movement_str = NOT_AVAILABLE
     else:
@@ -355,6 +372,29 @@ def present(name_or_id: str):
     )
 
 
+def get_storms(*ids):
+    """Find several past TCs at once.
+
+    Parameters:
+    ids - IBTrACS IDs or ATCF IDs, separated by spaces.
+    """
+    ids = [str(id) for id in ids]
+    for id, storm in zip(ids, ibtracs.get_storms(ids)):
+        if storm is None:
+            yield CLI_PAST_STORM_MISSING.format(id)
+        else:
+            yield CLI_PAST_STORM_LINE.format(
+                id,
+                storm.nature(),
+                storm.name,
+                storm.season,
+                storm.basin,
+                storm.peak_winds,
+                storm.peak_pres,
+                storm.best_track_id,
+            )
+
+
 def cli():
     """The main function of the CLI."""
     if stdin.isatty():
@@ -5,17 +5,18 @@ from . import server_vars
 from . import global_vars
 from . import atcf
 from . import errors
+from . import http_client
 import datetime
 import logging
 import time
 import asyncio
 import sys
 from . import ibtracs
-from types import GeneratorType
 from .uptime import *
 from .dir_calc import get_dir
-from io import StringIO
+from io import BytesIO, StringIO
 from os import uname
+from typing import List, Optional
 from .locales import *
 
 copyright_notice = """
@@ -58,6 +59,9 @@ except ImportError as e:
 
 KT_TO_MPH = 1.15077945
 KT_TO_KMH = 1.852
+# seconds before the buttons of /get_past_storm results stop working;
+# ephemeral messages can only be edited for 15 minutes
+PAGE_TIMEOUT = 600
 COMMON_COMMANDS = {
     "ping",
     "invite",
@@ -105,7 +109,19 @@ INTERNAL_COMMANDS = {
     "resume_updates",
     "contact_guild",
 }
-bot = discord.Bot(
+
+
+class CycloMonitorBot(discord.Bot):
+    """discord.Bot that also closes the shared HTTP session on shutdown."""
+
+    async def close(self):
+        try:
+            await super().close()
+        finally:
+            await http_client.close()
+
+
+bot = CycloMonitorBot(
     intents=discord.Intents.default(),
     default_command_integration_types={
         discord.IntegrationType.guild_install,
@@ -122,20 +138,23 @@ times = [
 log = logging.getLogger(__name__)
 languages = ["C", "en_US"]
 emojis = {}
-most_recent_dissipation = None
 help = bot.create_group("help", CM_HELP_GENERAL)
 
 
 class monitor(commands.Cog):
     """This class governs automated routines."""
 
-    def __init__(self, bot):
+    def __init__(self, bot, published: Optional[atcf.StormTable] = None):
         self.bot: discord.Bot = bot
+        # the storms auto_update last posted; commands like /update refresh
+        # the current snapshot too, so changes are counted from these
+        if published is None:
+            published = atcf.snapshot()
+        self.published: atcf.StormTable = published
         self.last_update = global_vars.get("last_update")
         self.last_ibtracs_update = global_vars.get("last_ibtracs_update")
         self.auto_update.start()
         self.daily_ibtracs_update.start()
-        self.is_best_track_updating = False
 
     def cog_unload(self):
         logging.info(LOG_MONITOR_STOP)
@@ -143,37 +162,19 @@ class monitor(commands.Cog):
         self.daily_ibtracs_update.cancel()
 
     @staticmethod
-    def should_suppress(prev_timestamps: dict):
-        """Compare two lists of timestamps and return a boolean."""
-        suppressed = []
-        for index, (cyclone, timestamp) in enumerate(
-            zip(atcf.cyclones, atcf.timestamps)
-        ):
-            if cyclone == most_recent_dissipation:
-                suppressed.append(True)
-            else:
-                try:
-                    # will this system request for a suppression?
-                    suppressed.append(prev_timestamps[cyclone] >= timestamp)
-                except LookupError:
-                    suppressed.append(False)
-                logging.debug(
-                    LOG_TIMESTAMP_COMPARISON.format(cyclone, suppressed[index])
-                )
-        if not atcf.cyclones:
-            suppressed.append(False)
-        # only suppress an automatic update if all active systems requested a suppression
-        for do_suppress in suppressed:
-            if not do_suppress:
-                return False
-        return True
+    def should_suppress(
+        changes: List[atcf.StormChange], storms: atcf.StormTable
+    ) -> bool:
+        """Given the changes since the last update, return a boolean."""
+        for change in changes:
+            logging.debug(LOG_STORM_CHANGE.format(change.cid, change.kind.value))
+        # when there are no storms, we still want to say so
+        return not changes and bool(storms)
 
     @tasks.loop(time=times)
     async def auto_update(self):
         logging.info(LOG_AUTO_UPDATE_BEGIN)
-        prev_timestamps = {
-            cid: time for cid, time in zip(atcf.cyclones, atcf.timestamps)
-        }
+        previous = self.published
         try:
             await atcf.get_data()
         except atcf.ATCFError as e:
@@ -181,18 +182,20 @@ class monitor(commands.Cog):
             return
         self.last_update = math.floor(time.time())
         global_vars.write("last_update", self.last_update)
-        for cid in prev_timestamps:
-            if cid not in atcf.cyclones:
-                most_recent_dissipation = cid
-        if self.should_suppress(prev_timestamps):
+        storms = atcf.snapshot()
+        changes = atcf.diff(previous, storms)
+        if self.should_suppress(changes, storms):
             # try alternate source
             logging.warning(LOG_SUPPRESSED)
             try:
-                await atcf.get_data_alt()
+                # bypass the refresh window; we just downloaded
+                await atcf.get_data_alt(max_age=0)
             except atcf.ATCFError as e:
                 logging.exception(ERROR_AUTO_UPDATE_FAILED)
                 return
-            if self.should_suppress(prev_timestamps):
+            storms = atcf.snapshot()
+            changes = atcf.diff(previous, storms)
+            if self.should_suppress(changes, storms):
                 logging.warning(LOG_SUPPRESSED_TRY_2)
                 for guild in bot.guilds:
                     channel_id = server_vars.get("tracking_channel", guild.id)
@@ -214,7 +217,8 @@ class monitor(commands.Cog):
         for guild in bot.guilds:
             channel_id = server_vars.get("tracking_channel", guild.id)
             if channel_id is not None:
-                await update_guild(guild.id, channel_id)
+                await update_guild(guild.id, channel_id, storms, changes)
+        self.published = storms
 
     @auto_update.error
     async def on_update_error(self, error):
@@ -242,7 +246,6 @@ class monitor(commands.Cog):
 
     @tasks.loop(time=datetime.time(0, 0, tzinfo=datetime.UTC))
     async def daily_ibtracs_update(self, *, _force_full=False):
-        self.is_best_track_updating = True
         now = datetime.datetime.now(datetime.UTC)
         logging.info(LOG_IBTRACS_UPDATE_BEGIN)
         if (now.day == 2) or _force_full:
@@ -250,7 +253,6 @@ class monitor(commands.Cog):
         else:
             await ibtracs.update_db("last3")
         global_vars.write("last_ibtracs_update", math.floor(time.time()))
-        self.is_best_track_updating = False
 
     @daily_ibtracs_update.error
     async def on_ibtracs_update_error(self, error):
@@ -264,7 +266,6 @@ class monitor(commands.Cog):
                 logging.error(LOG_ATTEMPT_FAILED.format(i + 2))
                 if i == 3:
                     logging.exception(ERROR_IBTRACS_UPDATE_FAILED)
-                    self.is_best_track_updating = False
                     raise e from error
                 else:
                     logging.error(LOG_TRY_AGAIN.format(10 * (i + 2)))
@@ -272,7 +273,6 @@ class monitor(commands.Cog):
                     continue
             else:
                 break
-        self.is_best_track_updating = False
 
     async def am_i_late(self):
         # force an automatic update if last_update is not set or more than 6
@@ -285,15 +285,68 @@ class monitor(commands.Cog):
         if (self.last_ibtracs_update is None) or (
             math.floor(time.time()) - self.last_ibtracs_update > 86400
         ):
-            await self.daily_ibtracs_update()
+            if ibtracs.updating():
+                # the update of a previous cog is still being built
+                logging.info(LOG_IBTRACS_UPDATE_RUNNING)
+            else:
+                await self.daily_ibtracs_update()
 
-    async def wait_for_ibtracs(self):
-        while self.is_best_track_updating:
-            await asyncio.sleep(1)
 
+def get_basin(basin: str, lat: float, long: float) -> str:
+    """Given ATCF's basin and a storm's position, return the basin it's in."""
+    # accomodate for basin crossovers
+    # ignore mediterranean storms
+    if basin != "MED":
+        if lat > 0 and long > 30 and long < 97:
+            basin = "IO"
+        elif lat > 0 and long > 97:
+            basin = "WPAC"
+        elif lat > 0 and long < -140:
+            basin = "CPAC"
+        elif lat > 0 and (
+            (lat < 7.6 and long < -77)
+            or (lat < 10 and long < -85)
+            or (lat < 15 and long < -87)
+            or (lat < 16 and long < -92.5)
+            or long < -100
+        ):
+            basin = "EPAC"
+    return basin
+
+
+def is_basin_enabled(basin: str, enabled_basins: str) -> bool:
+    """Given a basin and a guild's enabled basins, return a boolean."""
+    # this check is really long since it needs to accomodate for every possible situation
+    return (
+        ((basin == "ATL" or basin == "MED") and enabled_basins[0] == "1")
+        or (basin == "EPAC" and enabled_basins[1] == "1")
+        or (basin == "CPAC" and enabled_basins[2] == "1")
+        or (basin == "WPAC" and enabled_basins[3] == "1")
+        or (basin == "IO" and enabled_basins[4] == "1")
+        or (basin == "SHEM" and enabled_basins[5] == "1")
+    )
 
-async def update_guild(guild: int, to_channel: int):
-    """Given a guild ID and channel ID, post ATCF data."""
+
+async def update_guild(
+    guild: int,
+    to_channel: int,
+    storms: Optional[atcf.StormTable] = None,
+    changes: Optional[List[atcf.StormChange]] = None,
+):
+    """Given a guild ID and channel ID, post ATCF data.
+
+    storms is the snapshot to post; it defaults to the current snapshot.
+    If changes (from atcf.diff) is given, only storms that changed are posted,
+    along with a notice for each storm that dissipated.
+    """
+    if storms is None:
+        storms = atcf.snapshot()
+    if changes is not None:
+        changed = {c.new.cid for c in changes if c.new is not None}
+        dissipated = [c.old for c in changes if c.kind is atcf.ChangeKind.DISSIPATED]
+    else:
+        changed = None
+        dissipated = []
     set_locale(server_vars.get("lang", guild))
     logging.info(LOG_UPDATE_GUILD.format(guild))
     channel = bot.get_channel(to_channel)
@@ -304,35 +357,25 @@ async def update_guild(guild: int, to_channel: int):
     current_TC_record = global_vars.get("strongest_storm")  # record-keeping
     if enabled_basins is not None:
         sent_list = []
-        for (
-            cyc_id,
-            basin,
-            wind,
-            name,
-            timestamp,
-            lat,
-            long,
-            pressure,
-            tc_class,
-            lat_real,
-            long_real,
-            movement_speed,
-            movement_dir,
-        ) in zip(
-            atcf.cyclones,
-            atcf.basins,
-            atcf.winds,
-            atcf.names,
-            atcf.timestamps,
-            atcf.lats,
-            atcf.longs,
-            atcf.pressures,
-            atcf.tc_classes,
-            atcf.lats_real,
-            atcf.longs_real,
-            atcf.movement_speeds,
-            atcf.movement_dirs,
-        ):
+        for storm in storms:
+            cyc_id = storm.cid
+            basin = storm.basin
+            wind = storm.wind
+            name = storm.name
+            timestamp = storm.timestamp
+            lat = storm.lat_str
+            long = storm.lon_str
+            pressure = storm.pressure
+            tc_class = storm.tc_class
+            # without interp data, fall back to the sector file's position
+            # and treat the movement as unavailable
+            lat_real = storm.lat if storm.lat_real is None else storm.lat_real
+            long_real = storm.lon if storm.lon_real is None else storm.lon_real
+            if storm.movement_dir is None or storm.movement_speed is None:
+                movement_speed = movement_dir = -1
+            else:
+                movement_speed = storm.movement_speed
+                movement_dir = storm.movement_dir
             # per standard, we round to the nearest 5
             mph = round(wind * KT_TO_MPH / 5) * 5
             kmh = round(wind * KT_TO_KMH / 5) * 5
@@ -349,23 +392,7 @@ async def update_guild(guild: int, to_channel: int):
                 movement_str = STORM_MOVEMENT.format(
                     c_dir, movement_speed, movement_mph, movement_kph
                 )
-            # accomodate for basin crossovers
-            # ignore mediterranean storms
-            if basin != "MED":
-                if lat_real > 0 and long_real > 30 and long_real < 97:
-                    basin = "IO"
-                elif lat_real > 0 and long_real > 97:
-                    basin = "WPAC"
-                elif lat_real > 0 and long_real < -140:
-                    basin = "CPAC"
-                elif lat_real > 0 and (
-                    (lat_real < 7.6 and long_real < -77)
-                    or (lat_real < 10 and long_real < -85)
-                    or (lat_real < 15 and long_real < -87)
-                    or (lat_real < 16 and long_real < -92.5)
-                    or long_real < -100
-                ):
-                    basin = "EPAC"
+            basin = get_basin(basin, lat_real, long_real)
             logging.debug(LOG_BASIN.format(cyc_id, basin))
 
             if pressure == 0:
@@ -486,18 +513,13 @@ async def update_guild(guild: int, to_channel: int):
                     ],
                 )
 
-            # this check is really long since it needs to accomodate for every possible situation
-            send_message = (
-                ((basin == "ATL" or basin == "MED") and enabled_basins[0] == "1")
-                or (basin == "EPAC" and enabled_basins[1] == "1")
-                or (basin == "CPAC" and enabled_basins[2] == "1")
-                or (basin == "WPAC" and enabled_basins[3] == "1")
-                or (basin == "IO" and enabled_basins[4] == "1")
-                or (basin == "SHEM" and enabled_basins[5] == "1")
-            )
+            send_message = is_basin_enabled(basin, enabled_basins)
             sent_list.append(send_message)
             if math.isnan(pressure):
                 pressure = "N/A"
+            # unchanged storms were already posted last time
+            if changed is not None and cyc_id not in changed:
+                continue
             if send_message and channel is not None:
                 try:
                     await channel.send(
@@ -523,6 +545,18 @@ async def update_guild(guild: int, to_channel: int):
                 logging.warning(LOG_GUILD_UNAVAILABLE.format(guild))
                 return
 
+        for storm in dissipated:
+            basin = get_basin(storm.basin, storm.lat, storm.lon)
+            if is_basin_enabled(basin, enabled_basins):
+                if storm.name == "INVEST":
+                    display_name = storm.cid
+                else:
+                    display_name = f"{storm.cid} ({storm.name})"
+                try:
+                    await channel.send(CM_STORM_DISSIPATED.format(display_name))
+                except discord.errors.HTTPException:
+                    logging.warning(LOG_GUILD_UNAVAILABLE.format(guild))
+                    return
         for was_sent in sent_list:
             if was_sent:
                 break
@@ -555,23 +589,30 @@ async def on_ready():
     )
     logging.info(LOG_READY.format(bot.user))
     global_vars.write("guild_count", len(bot.guilds))
-    cog = monitor(bot)
+    await http_client.start()
+    await atcf.warm_up()
+    # on_ready runs again after a full reconnect
+    cog = new_monitor()
     bot.add_cog(cog)
     await cog.am_i_late()
 
 
+def new_monitor() -> monitor:
+    """Create the monitor cog. If there was one before, the new one takes
+    over the storms it last posted, so that automatic updates still post
+    what changed since then.
+    """
+    previous = globals().get("cog")
+    return monitor(bot, getattr(previous, "published", None))
+
+
 @bot.event
 async def on_disconnect():
-    cog: monitor = bot.get_cog("monitor")
-    if not (cog is None or cog.is_best_track_updating):
+    # cancelling a best track update doesn't stop its build, which keeps
+    # running in its own thread and file until it's published or discarded;
+    # later updates wait for it
+    if bot.get_cog("monitor") is not None:
         bot.remove_cog("monitor")
-    if cog is not None and cog.is_best_track_updating:
-        try:
-            await asyncio.wait_for(cog.wait_for_ibtracs(), timeout=60.0)
-        finally:
-            bot.remove_cog("monitor")
-            if bot.is_ready():
-                bot.add_cog(monitor())
 
 
 @bot.event
@@ -579,7 +620,7 @@ async def on_resumed():
     global cog
     if bot.get_cog("monitor") is None and bot.is_ready():
         # The cog is already closed; it's safe to overwrite the old cog
-        cog = monitor(bot)
+        cog = new_monitor()
         bot.add_cog(cog)
         await cog.am_i_late()
 
@@ -694,9 +735,8 @@ async def update(ctx):
     await atcf.get_data()
     cog.last_update = math.floor(time.time())
     global_vars.write("last_update", cog.last_update)
-    await update_guild(ctx.guild_id, channel_id)
+    await update_guild(ctx.guild_id, channel_id, atcf.snapshot())
     await ctx.respond(CM_UPDATE_SUCCESS, ephemeral=True)
-    atcf.reset()
 
 
 @bot.slash_command(
@@ -715,9 +755,8 @@ async def update_alt(ctx):
     await atcf.get_data_alt()
     cog.last_update = math.floor(time.time())
     global_vars.write("last_update", cog.last_update)
-    await update_guild(ctx.guild_id, channel_id)
+    await update_guild(ctx.guild_id, channel_id, atcf.snapshot())
     await ctx.respond(CM_UPDATE_SUCCESS, ephemeral=True)
-    atcf.reset()
 
 
 @bot.slash_command(
@@ -754,11 +793,12 @@ async def update_all(ctx):
     await atcf.get_data()
     cog.last_update = math.floor(time.time())
     global_vars.write("last_update", cog.last_update)
+    storms = atcf.snapshot()
     for guild in bot.guilds:
         channel_id = server_vars.get("tracking_channel", guild.id)
         # attempt to update only if the tracking channel is set
         if channel_id is not None:
-            await update_guild(guild.id, channel_id)
+            await update_guild(guild.id, channel_id, storms)
     await ctx.respond(CM_UPDATE_SUCCESS, ephemeral=True)
 
 
@@ -770,11 +810,12 @@ async def update_all_alt(ctx):
     await atcf.get_data_alt()
     cog.last_update = math.floor(time.time())
     global_vars.write("last_update", cog.last_update)
+    storms = atcf.snapshot()
     for guild in bot.guilds:
         channel_id = server_vars.get("tracking_channel", guild.id)
         # attempt to update only if the tracking channel is set
         if channel_id is not None:
-            await update_guild(guild.id, channel_id)
+            await update_guild(guild.id, channel_id, storms)
     await ctx.respond(CM_UPDATE_SUCCESS, ephemeral=True)
 
 
@@ -1041,78 +1082,141 @@ async def get_past_storm(
     ),  # type: ignore
 ):
     await ctx.defer(ephemeral=True)
-    if cog.is_best_track_updating:
-        await ctx.respond(CM_WAIT_FOR_IBTRACS_UPDATE)
-        response = await ctx.interaction.original_response()
-        while cog.is_best_track_updating:
-            await asyncio.sleep(0.25)
-        await response.edit_message(content=CM_SEARCHING)
-    else:
-        await ctx.respond(CM_SEARCHING)
-        response = await ctx.interaction.original_response()
+    await ctx.respond(CM_SEARCHING)
+    response = await ctx.interaction.original_response()
+    filters = dict(
+        name=name,
+        season=season,
+        basin=basin,
+        atcf_id=atcf_id,
+        ibtracs_id=ibtracs_id,
+        table=table,
+        lang=server_vars.get("lang", ctx.guild_id),
+    )
     try:
-        results = ibtracs.get_storm(
-            name=name,
-            season=season,
-            basin=basin,
-            atcf_id=atcf_id,
-            ibtracs_id=ibtracs_id,
-            table=table,
-            lang=server_vars.get("lang", ctx.guild_id),
-        )
-    except ValueError as e:
+        page = await ibtracs.aget_storm_page(**filters)
+    except (ValueError, asyncio.TimeoutError) as e:
         await response.edit(CM_ERROR.format(e))
         return
-    if isinstance(results, GeneratorType):
-        res_tmp = StringIO()
-        res_tmp.write(CM_MULTIPLE_STORMS)
-        lines = [f"{s}\n" for s in results]
-        res_tmp.writelines(lines)
-        await response.edit(res_tmp.getvalue())
-        res_tmp.close()
-    elif isinstance(results, ibtracs.Storm):
-        peak_timestamp = int(
-            datetime.datetime.fromisoformat(results.time_of_peak)
-            .replace(tzinfo=datetime.UTC)
-            .timestamp()
-        )
-        nature = results.nature().title()
-        name = results.name.title()
-        if name == "Not_Named":
-            descriptor = CM_UNNAMED_STORM.format(nature)
-        else:
-            descriptor = f"{nature} {name}"
-        if not results.peak_winds:
-            peak_winds = CM_UNKNOWN
-            peak_time = CM_UNKNOWN
-        else:
-            peak_winds = f"{results.peak_winds} kt"
-            peak_time = f"<t:{peak_timestamp}:f>"
-        if not results.peak_pres:
-            peak_pres = CM_UNKNOWN
-        else:
-            peak_pres = f"{results.peak_pres} mb"
-        if results.atcf_id is None:
-            atcf_id = CM_UNKNOWN
-        else:
-            atcf_id = results.atcf_id
-        await response.edit(
-            content=CM_PAST_STORM_INFO.format(
-                descriptor,
-                results.season,
-                results.basin,
-                peak_winds,
-                peak_pres,
-                peak_time,
-                atcf_id,
-                results.best_track_id,
-            )
-        )
-    elif results is None:
+    if not page.storms:
         await response.edit(content=CM_NO_RESULTS)
+    elif len(page.storms) == 1 and not page.has_next:
+        await response.edit(content=past_storm_info(page.storms[0]))
+    else:
+        view = PastStormPages(filters, page)
+        view.message = response
+        await response.edit(content=view.content(), view=view)
+
+
+def past_storm_info(storm: ibtracs.Storm) -> str:
+    """Describe a storm found by /get_past_storm."""
+    peak_timestamp = int(
+        datetime.datetime.fromisoformat(storm.time_of_peak)
+        .replace(tzinfo=datetime.UTC)
+        .timestamp()
+    )
+    nature = storm.nature().title()
+    name = storm.name.title()
+    if name == "Not_Named":
+        descriptor = CM_UNNAMED_STORM.format(nature)
+    else:
+        descriptor = f"{nature} {name}"
+    if not storm.peak_winds:
+        peak_winds = CM_UNKNOWN
+        peak_time = CM_UNKNOWN
+    else:
+        peak_winds = f"{storm.peak_winds} kt"
+        peak_time = f"<t:{peak_timestamp}:f>"
+    if not storm.peak_pres:
+        peak_pres = CM_UNKNOWN
     else:
-        # you should never see this error ;-)
-        raise TypeError(ERROR_WTF.format(type(results)))
+        peak_pres = f"{storm.peak_pres} mb"
+    if storm.atcf_id is None:
+        atcf_id = CM_UNKNOWN
+    else:
+        atcf_id = storm.atcf_id
+    return CM_PAST_STORM_INFO.format(
+        descriptor,
+        storm.season,
+        storm.basin,
+        peak_winds,
+        peak_pres,
+        peak_time,
+        atcf_id,
+        storm.best_track_id,
+    )
+
+
+class PastStormPages(discord.ui.View):
+    """Buttons that page through the storms found by /get_past_storm.
+
+    Each page is looked up when it's shown, so no more than one page of
+    storms is kept in memory.
+    """
+
+    def __init__(self, filters: dict, page: ibtracs.Page):
+        super().__init__(timeout=PAGE_TIMEOUT)
+        self.filters = filters
+        self.page = page
+        self.number = 1
+        self.update_buttons()
+
+    def content(self) -> str:
+        with StringIO() as ss:
+            ss.write(CM_MULTIPLE_STORMS)
+            for storm in self.page.storms:
+                query = ibtracs.Query(
+                    storm.best_track_id, storm.season, storm.basin, storm.name
+                )
+                ss.write(f"{query}\n")
+            ss.write(CM_PAGE_NUMBER.format(self.number))
+            return ss.getvalue()
+
+    def update_buttons(self):
+        self.previous_page.disabled = not self.page.has_previous
+        self.next_page.disabled = not self.page.has_next
+
+    @discord.ui.button(label=CM_PREVIOUS_PAGE, style=discord.ButtonStyle.secondary)
+    async def previous_page(
+        self, button: discord.ui.Button, interaction: discord.Interaction
+    ):
+        await self.turn(interaction, -1, before=self.page.storms[0].best_track_id)
+
+    @discord.ui.button(label=CM_NEXT_PAGE, style=discord.ButtonStyle.secondary)
+    async def next_page(
+        self, button: discord.ui.Button, interaction: discord.Interaction
+    ):
+        await self.turn(interaction, 1, after=self.page.storms[-1].best_track_id)
+
+    async def turn(self, interaction: discord.Interaction, step: int, **cursor):
+        # the query may take longer than Discord waits for a response
+        await interaction.response.defer()
+        try:
+            page = await ibtracs.aget_storm_page(**self.filters, **cursor)
+        except (ValueError, asyncio.TimeoutError) as e:
+            self.stop()
+            await interaction.edit_original_response(
+                content=CM_ERROR.format(e), view=None
+            )
+            return
+        if not page.storms:
+            # the database was updated since the last page
+            self.stop()
+            await interaction.edit_original_response(content=CM_NO_RESULTS, view=None)
+            return
+        self.page = page
+        self.number += step
+        self.update_buttons()
+        await interaction.edit_original_response(content=self.content(), view=self)
+
+    async def on_timeout(self):
+        self.disable_all_items()
+        if self.message is not None:
+            try:
+                await self.message.edit(view=self)
+            except discord.HTTPException:
+                # the message was deleted, or can't be edited anymore
+                pass
 
 
 @bot.slash_command(
@@ -1133,7 +1237,7 @@ async def set_language(
 
 
 async def storms(ctx: discord.AutocompleteContext):
-    return [n for n in atcf.names if n != "INVEST"]
+    return [n for n in atcf.snapshot().names() if n != "INVEST"]
 
 
 @bot.slash_command(name="get_forecast", description=CM_GET_FORECAST)
@@ -1150,22 +1254,24 @@ async def get_forecast(
         await ctx.respond(CM_IS_AN_INVEST)
         return
 
+    storms = atcf.snapshot()
     try:
-        ext = await atcf.get_forecast(name=name, use_exper=experimental)
+        image = await atcf.get_forecast(name=name, use_exper=experimental)
     except atcf.NoActiveStorms:
         await ctx.respond(CM_NO_ACTIVE_STORMS)
     except Exception as e:
         await on_application_command_error(ctx, e)
     else:
-        if ext is None:
+        if image is None:
             await ctx.respond(
                 CM_CANNOT_FIND_STORM.format(
-                    "\n".join([n for n in atcf.names if n != "INVEST"])
+                    "\n".join([n for n in storms.names() if n != "INVEST"])
                 )
             )
         else:
-            with open(f"forecast.{ext}", "rb") as f:
-                await ctx.respond(file=discord.File(f))
+            await ctx.respond(
+                file=discord.File(BytesIO(image.data), filename=image.filename)
+            )
 
 
 @bot.slash_command(name="server", description=CM_SERVER)
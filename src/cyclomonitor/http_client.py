@@ -0,0 +1,108 @@
+# CycloMonitor Copyright (C) 2023 Nathaniel Greenwell
+# This program comes with ABSOLUTELY NO WARRANTY; for details see main.py
+"""
+CycloMonitor HTTP client
+
+All outbound requests share one aiohttp session per process, so that
+connections (and DNS lookups) are reused instead of being set up again for
+every request.
+
+Functions:
+start -- create the shared session
+get_session -- get the shared session, creating it if needed
+close -- close the shared session
+stats -- get connection statistics
+"""
+
+import asyncio
+import aiohttp
+import logging
+from typing import Dict, Optional
+from .locales import *
+
+# total number of simultaneous connections
+LIMIT = 30
+# simultaneous connections to the same host
+LIMIT_PER_HOST = 6
+# how long resolved addresses are cached, in seconds
+DNS_CACHE_TTL = 600
+# how long idle connections are kept open, in seconds
+KEEPALIVE_TIMEOUT = 60
+# default timeouts; requests that take longer (e.g. large downloads) should
+# pass their own timeout
+TIMEOUT = aiohttp.ClientTimeout(total=60, connect=10)
+log = logging.getLogger(__name__)
+_session: Optional[aiohttp.ClientSession] = None
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_stats = {"requests": 0, "new_connections": 0, "reused_connections": 0}
+
+
+async def _on_request_start(session, ctx, params):
+    _stats["requests"] += 1
+
+
+async def _on_connection_create_end(session, ctx, params):
+    _stats["new_connections"] += 1
+
+
+async def _on_connection_reuseconn(session, ctx, params):
+    _stats["reused_connections"] += 1
+
+
+def _trace_config() -> aiohttp.TraceConfig:
+    trace_config = aiohttp.TraceConfig()
+    trace_config.on_request_start.append(_on_request_start)
+    trace_config.on_connection_create_end.append(_on_connection_create_end)
+    trace_config.on_connection_reuseconn.append(_on_connection_reuseconn)
+    return trace_config
+
+
+async def start() -> aiohttp.ClientSession:
+    """Create the shared session if it doesn't exist yet and return it.
+
+    Responses with an error status raise aiohttp.ClientResponseError.
+    """
+    global _session, _loop
+    loop = asyncio.get_running_loop()
+    if _session is not None and not _session.closed:
+        if _loop is loop:
+            return _session
+        # a session can't outlive its event loop (the CLI runs a new loop for
+        # every command); forget about it and make a new one
+        log.debug(HTTP_STALE_SESSION)
+    connector = aiohttp.TCPConnector(
+        limit=LIMIT,
+        limit_per_host=LIMIT_PER_HOST,
+        use_dns_cache=True,
+        ttl_dns_cache=DNS_CACHE_TTL,
+        keepalive_timeout=KEEPALIVE_TIMEOUT,
+    )
+    _session = aiohttp.ClientSession(
+        connector=connector,
+        timeout=TIMEOUT,
+        raise_for_status=True,
+        trace_configs=[_trace_config()],
+    )
+    _loop = loop
+    log.debug(HTTP_SESSION_STARTED)
+    return _session
+
+
+async def get_session() -> aiohttp.ClientSession:
+    """Get the shared session. Alias of start()."""
+    return await start()
+
+
+async def close():
+    """Close the shared session, if there is one."""
+    global _session, _loop
+    session = _session
+    _session = _loop = None
+    if session is not None and not session.closed:
+        await session.close()
+        log.info(HTTP_SESSION_CLOSED.format(**_stats))
+
+
+def stats() -> Dict[str, int]:
+    """Get the number of requests made, and connections opened and reused."""
+    return dict(_stats)
@@ -4,30 +4,273 @@ CycloMonitor IBTrACS module
 Classes:
 Storm -- dataclass representing a TC
 Query -- like Storm but less detailed
+Page -- one page of search results
 Generators:
 query_group -- self-explanatory
 Functions:
 update_db -- update database
 init_db -- initialize database
 get_storm -- find TCs
+get_storms -- find several TCs by ID at once
+get_storm_page -- find TCs one page at a time
+aget_storm_page -- get_storm_page() without blocking the event loop
+iter_storms -- find TCs, reading them one page at a time
+aget_storm -- find TCs without blocking the event loop
+rebuild -- rebuild database from cached files
+updating -- check whether the database is being updated
+generation -- identify the current version of the database
+cache_stats -- report how well get_storm() results are cached
+index_db -- create missing indexes
+explain -- report how get_storm() searches the database
 :copyright: (c) 2024 by Nathaniel Greenwell.
 """
 
 import sqlite3
 import aiohttp
 import aiofiles
+import asyncio
+import collections
+import csv
+import gzip
+import hashlib
+import itertools
+import json
 import logging
+import multiprocessing
+import operator
 import os
+import re
+import time
+import zlib
 import subprocess
 import io
+import tempfile
+import threading
+import urllib.parse
+from concurrent.futures import (
+    Executor,
+    Future,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+)
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
 from dataclasses import dataclass
-from typing import Iterable, Literal, Tuple, Union
+from typing import Dict, Iterable, Iterator, List, Literal, Optional, Set, Tuple
+from .. import http_client
 from .locales import *
 
 log = logging.getLogger(__name__)
 PATH = os.path.dirname(os.path.realpath(__file__))
 DB = f"{PATH}/BestTrack.db"
 BASE_URI = "https://www.ncei.noaa.gov/data/international-best-track-archive-for-climate-stewardship-ibtracs/v04r00/access/csv"
+# the data files are large, so downloads get more time than the shared default
+TIMEOUT = aiohttp.ClientTimeout(total=None, connect=10, sock_read=300)
+# downloads are written to disk in chunks of this many bytes
+CHUNK_SIZE = 1024 * 1024
+# The raw CSV files are cached in this directory, compressed with gzip, so
+# that unchanged files aren't downloaded again and the database can be
+# rebuilt offline.
+RAW_DIR = f"{PATH}/raw"
+RAW_COMPRESSION_LEVEL = 6
+# partial downloads are saved every this many bytes, so that an interrupted
+# download can resume from there
+CHECKPOINT_SIZE = 16 * 1024 * 1024
+# file on the server, name of the cached file, and schema of each table
+SOURCES = {
+    "LastThreeYears": (
+        "ibtracs.last3years.list.v04r00.csv",
+        "ibtracs_last3",
+        "ibtracs_LAST3.sql",
+    ),
+    "AllBestTrack": ("ibtracs.ALL.list.v04r00.csv", "ibtracs_all", "ibtracs_ALL.sql"),
+}
+# the CSV files start with a row of column names and a row of units
+HEADER_LINES = 2
+# rows are inserted this many at a time
+IMPORT_BATCH_SIZE = 10000
+# page cache used while importing, in KiB
+IMPORT_CACHE_SIZE = 64 * 1024
+# processes that parse the raw CSV files while they're imported
+PARSE_WORKERS = os.cpu_count() or 1
+# chunks of IMPORT_BATCH_SIZE rows read ahead of the database writer
+PARSE_QUEUE_SIZE = 2 * PARSE_WORKERS
+# the database is rewritten after an update if more than this fraction of it
+# is free space
+VACUUM_THRESHOLD = 0.25
+# read-only connections kept open between queries
+POOL_SIZE = 4
+# how much of the database each pooled connection maps into memory, in bytes
+READ_MMAP_SIZE = 256 * 1024 * 1024
+# page cache of each pooled connection, in KiB
+READ_CACHE_SIZE = 16 * 1024
+# prepared statements cached by each pooled connection
+CACHED_STATEMENTS = 64
+# threads running queries for aget_storm()
+QUERY_WORKERS = 4
+# seconds before aget_storm() gives up on a query
+QUERY_TIMEOUT = 10.0
+# storms per page of get_storm_page()
+PAGE_SIZE = 20
+# shadow files (see _open_shadow()) that haven't been written to for this
+# many seconds are left over from an interrupted build
+STALE_SHADOW_AGE = 24 * 60 * 60
+# seconds between checks for the end of the update in progress
+UPDATE_POLL_INTERVAL = 1.0
+# Results of get_storm() kept in memory, for the most recently used
+# combinations of filters. They are dropped when a new database is
+# published. Set to 0 to disable the cache.
+CACHE_SIZE = 1024
+# Indexes built on STORE after importing. They cover every column that
+# get_storm() and Storm.is_subtropical() filter on.
+INDEXES = {
+    "SID": ("SID", "ISO_TIME"),
+    "NAME": ("NAME", "SEASON", "BASIN"),
+    "SEASON": ("SEASON", "BASIN"),
+    "ATCF_ID": ("USA_ATCF_ID",),
+}
+TABLES = ("LastThreeYears", "AllBestTrack")
+# Both tables are stored once, in this table: AllBestTrack is a view of all
+# of it, and LastThreeYears a view of the storms in the last three years'
+# file. A storm's rows come from whichever file last changed them.
+STORE = "BestTrack"
+# Columns of the raw files that are kept in STORE; the others are dropped
+# when importing. Set to None to keep every column. Everything is imported
+# again on the next update after this is changed.
+COLUMNS = (
+    "SID",
+    "SEASON",
+    "BASIN",
+    "NAME",
+    "ISO_TIME",
+    "NATURE",
+    "LAT",
+    "LON",
+    "WMO_WIND",
+    "WMO_PRES",
+    "WMO_AGENCY",
+    "USA_AGENCY",
+    "USA_ATCF_ID",
+    "USA_WIND",
+    "USA_PRES",
+    "USA_SSHS",
+)
+# columns that the indexes, the storm summaries and the queries use
+_REQUIRED_COLUMNS = {
+    "SID",
+    "SEASON",
+    "BASIN",
+    "NAME",
+    "ISO_TIME",
+    "NATURE",
+    "WMO_WIND",
+    "WMO_PRES",
+    "USA_ATCF_ID",
+    "USA_WIND",
+    "USA_PRES",
+    "USA_SSHS",
+}
+# Columns with few distinct values that are long, like agency names. They're
+# stored as codes; CodedValue maps the codes back to the values.
+CODED_COLUMNS = ("WMO_AGENCY", "USA_AGENCY")
+# how the column types of ibtracs_*.sql are stored
+_STORAGE_TYPES = {
+    "VARCHAR": "TEXT",
+    "INTEGER": "INTEGER",
+    "NUMERIC": "REAL",
+    "BIT": "INTEGER",
+}
+# a column definition in ibtracs_*.sql, e.g. "  ,SEASON           INTEGER"
+_COLUMN_DEF = re.compile(r"^\s*,?\s*([A-Z0-9_]+)\s+([A-Z]+)", re.MULTILINE)
+# One row per storm, built at import time, so that looking up a storm's
+# peak doesn't have to go through its track.
+_SUMMARY_SCHEMA = """CREATE TABLE IF NOT EXISTS StormSummary(
+   SID          VARCHAR(13) NOT NULL
+  ,SEASON       INTEGER  NOT NULL
+  ,BASIN        VARCHAR(2) NOT NULL
+  ,NAME         VARCHAR(16) NOT NULL
+  ,ATCF_ID      VARCHAR(8)
+  ,PEAK_WIND    INTEGER  NOT NULL
+  ,PEAK_PRES    INTEGER  NOT NULL
+  ,PEAK_TIME    VARCHAR(19) NOT NULL
+  ,SUBTROPICAL  BIT  NOT NULL
+  ,PRIMARY KEY(SID)
+) WITHOUT ROWID"""
+# Fingerprint of each storm's rows in each raw file, used by incremental
+# updates. It also records which tables each storm is in.
+_DIGEST_SCHEMA = """CREATE TABLE IF NOT EXISTS StormDigest(
+   SRC          VARCHAR(14) NOT NULL
+  ,SID          VARCHAR(13) NOT NULL
+  ,DIGEST       BLOB NOT NULL
+  ,PRIMARY KEY(SRC, SID)
+) WITHOUT ROWID"""
+# Which version of the raw file each table was imported from
+_SOURCE_SCHEMA = """CREATE TABLE IF NOT EXISTS RawSource(
+   SRC          VARCHAR(14) PRIMARY KEY
+  ,VERSION      TEXT
+)"""
+# an IBTrACS ID, e.g. 2005236N23285
+_SID = re.compile(r"[0-9]{7}[NS][0-9]{5}")
+# whether a storm is in LastThreeYears
+_RECENT = "SID IN (SELECT SID FROM StormDigest WHERE SRC = 'LastThreeYears')"
+# the tables, as views of STORE
+_VIEWS = {
+    "LastThreeYears": f"SELECT * FROM {STORE} WHERE {_RECENT}",
+    "AllBestTrack": f"SELECT * FROM {STORE}",
+}
+# values of CODED_COLUMNS
+_CODE_SCHEMA = """CREATE TABLE IF NOT EXISTS CodedValue(
+   CODE         INTEGER PRIMARY KEY
+  ,VALUE        TEXT NOT NULL UNIQUE
+)"""
+# storms touched by an update
+_CHANGED_SCHEMA = """CREATE TEMP TABLE IF NOT EXISTS ChangedStorms(
+   SID          VARCHAR(13) PRIMARY KEY
+)"""
+# Each storm's peak, from the least to the most preferred source; later
+# sources replace earlier ones. Columns are SID, SEASON, BASIN, NAME,
+# ATCF_ID, WIND, PRES, TIME, and the values of the other columns come from
+# the point where the storm peaked. {sids} limits which storms are included.
+_PEAK_QUERIES = (
+    # no winds at all: use the highest category and report no winds
+    """SELECT SID, SEASON, BASIN, NAME, ATCF_ID, 0 AS WIND, PRES, TIME FROM (
+        SELECT SID, SEASON, BASIN, NAME, USA_ATCF_ID AS ATCF_ID,
+            WMO_PRES AS PRES, ISO_TIME AS TIME, MAX(USA_SSHS)
+        FROM {table} WHERE {sids} GROUP BY SID
+    )""",
+    # WMO winds
+    """SELECT SID, SEASON, BASIN, NAME, USA_ATCF_ID AS ATCF_ID,
+        MAX(WMO_WIND) AS WIND, WMO_PRES AS PRES, ISO_TIME AS TIME
+    FROM {table} WHERE WMO_WIND IS NOT NULL AND {sids} GROUP BY SID""",
+    # US winds while not extratropical; if there is no US pressure at the
+    # peak, use the WMO pressure
+    """SELECT SID, SEASON, BASIN, NAME, ATCF_ID, WIND,
+        CASE WHEN PRES IS NULL THEN (
+            SELECT WMO_PRES FROM {table} AS p
+            WHERE p.SID = peak.SID AND p.ISO_TIME = peak.TIME
+        ) ELSE PRES END AS PRES, TIME
+    FROM (
+        SELECT SID, SEASON, BASIN, NAME, USA_ATCF_ID AS ATCF_ID,
+            MAX(USA_WIND) AS WIND, USA_PRES AS PRES, ISO_TIME AS TIME
+        FROM {table}
+        WHERE USA_WIND IS NOT NULL AND NATURE IS NOT 'ET' AND {sids}
+        GROUP BY SID
+    ) AS peak""",
+)
+_pool: List[sqlite3.Connection] = []
+_pool_generation: Optional[Tuple[int, int]] = None
+_pool_lock = threading.Lock()
+_executor: Optional[ThreadPoolExecutor] = None
+# Held while the database is updated, rebuilt or indexed. Cancelling the task
+# awaiting an update doesn't stop its build thread, so the lock is only
+# released when the thread is done (see _exclusive()).
+_update_lock = threading.Lock()
+_builder: Optional[ThreadPoolExecutor] = None
+_build: Optional[Future] = None
+_cache: "collections.OrderedDict[tuple, tuple]" = collections.OrderedDict()
+_cache_generation: Optional[Tuple[int, int]] = None
+_cache_lock = threading.Lock()
+_cache_stats = {"hits": 0, "misses": 0, "evictions": 0}
 if not os.path.exists(DB):
     log.info(IBTRACS_DB_NOT_FOUND)
 
@@ -45,6 +288,8 @@ class Storm:
     name -- the storm's name
     best_track_id -- the storm's IBTrACS ID
     season -- the year the storm formed in
+    subtropical -- whether the storm was subtropical at peak, or None if
+    unknown
     Methods:
     nature() -- cyclonic nature at peak
     is_subtropical()
@@ -58,6 +303,7 @@ class Storm:
     name: str = "NOT_NAMED"
     best_track_id: str = ""
     season: int = 0
+    subtropical: Optional[bool] = None
 
     def nature(self) -> str:
         """Based on peak winds, return a string."""
@@ -86,17 +332,22 @@ class Storm:
         return CLASS_TC
 
     def is_subtropical(self, *, table="LastThreeYears"):
-        """Determine whether or not this TC was subtropical at peak."""
+        """Determine whether or not this TC was subtropical at peak.
+
+        Storms returned by get_storm() already know; for other storms, the
+        database is searched. If table is LastThreeYears, the points of the
+        storms in it are preferred.
+        """
+        if self.subtropical is not None:
+            return self.subtropical
         if not self.peak_winds:
             return False
         for v in self.__dict__.values():
             if isinstance(v, str) and ("'" in v or ";" in v):
                 return False
-        con = sqlite3.connect(DB)
-        cur = con.cursor()
         if self.best_track_id:
             params = [self.best_track_id, self.peak_winds, self.peak_winds]
-            conds = f"SID = ? AND NATURE != 'ET' AND (WMO_WIND = ? OR USA_WIND = ?)"
+            conds = f"SID = ? AND NATURE IS NOT 'ET' AND (WMO_WIND = ? OR USA_WIND = ?)"
         else:
             params = [
                 self.name,
@@ -105,17 +356,17 @@ class Storm:
                 self.peak_winds,
                 self.peak_winds,
             ]
-            conds = f"NAME = ? AND SEASON = ? AND BASIN = ? AND NATURE != 'ET' AND (WMO_WIND = ? OR USA_WIND = ?)"
-        res = cur.execute(f"SELECT NATURE FROM {table} WHERE {conds}", params)
-        natures = res.fetchall()
-        con.close()
-        if natures:
-            if (("SS",) in natures or ("DS",) in natures) and ("TS",) not in natures:
-                return True
+            conds = f"NAME = ? AND SEASON = ? AND BASIN = ? AND NATURE IS NOT 'ET' AND (WMO_WIND = ? OR USA_WIND = ?)"
+        with _reader() as con:
+            res = con.execute(
+                f"SELECT NATURE, {_RECENT} FROM {STORE} WHERE {conds}", params
+            )
+            points = res.fetchall()
+        if table == "LastThreeYears" and any(recent for _, recent in points):
+            natures = {nature for nature, recent in points if recent}
         else:
-            if not natures and table == "LastThreeYears":
-                return self.is_subtropical(table="AllBestTrack")
-        return False
+            natures = {nature for nature, _ in points}
+        return ("SS" in natures or "DS" in natures) and "TS" not in natures
 
 
 @dataclass(frozen=True, repr=False)
@@ -138,6 +389,21 @@ class Query:
         return QUERY_REPR.format(self=self)
 
 
+@dataclass(frozen=True)
+class Page:
+    """One page of the storms found by get_storm_page().
+
+    Attributes:
+    storms -- the storms on the page, sorted by IBTrACS ID
+    has_previous -- whether there are storms before them
+    has_next -- whether there are storms after them
+    """
+
+    storms: Tuple[Storm, ...]
+    has_previous: bool
+    has_next: bool
+
+
 def query_group(queries: Iterable[Tuple[str, int, str, str]]):
     """Yield Query objects.
 
@@ -148,61 +414,1019 @@ def query_group(queries: Iterable[Tuple[str, int, str, str]]):
         yield Query(sid, season, basin, name)
 
 
-async def _remove_headers(csv: Union[os.PathLike, str]):
-    if isinstance(csv, os.PathLike):
-        csv = os.fspath(csv)
-    csv_name = os.path.splitext(csv)[0]
-    async with aiofiles.open(csv) as f:
-        lines = await f.readlines()
-        data = lines[2:]
-    new_name = f"{csv_name}_NO_HEADING.csv"
+def _raw_path(table: str) -> str:
+    """(Internal) Where the raw CSV file of table is cached."""
+    return f"{RAW_DIR}/{SOURCES[table][1]}.csv.gz"
+
+
+def _read_json(path: str) -> Optional[dict]:
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+    except ValueError:
+        log.warning(IBTRACS_BAD_VALIDATORS.format(path))
+        return None
+
+
+def _write_json(path: str, data: dict):
+    with open(f"{path}.tmp", "w") as f:
+        json.dump(data, f)
+    os.replace(f"{path}.tmp", path)
+
+
+def _remove(*paths: str):
+    for path in paths:
+        try:
+            os.unlink(path)
+        except FileNotFoundError:
+            pass
+
+
+def _expected_size(r: aiohttp.ClientResponse, received: int) -> Optional[int]:
+    """(Internal) Get the size of the whole file being downloaded, if known."""
+    if "Content-Encoding" in r.headers:
+        # the size is that of the encoded file
+        return None
+    if r.status == 206:
+        total = r.headers.get("Content-Range", "").rpartition("/")[2]
+        return int(total) if total.isdigit() else None
+    if r.content_length is not None:
+        return received + r.content_length
+    return None
+
+
+async def _download_raw(table: str) -> bool:
+    """(Internal) Bring the cached raw CSV file of table up to date.
+
+    The file is streamed to disk in chunks of CHUNK_SIZE bytes and
+    compressed on the fly, so memory use doesn't depend on the size of the
+    file. If the cached file is still current, nothing is downloaded.
+    Partial downloads are saved every CHECKPOINT_SIZE bytes, and the next
+    call resumes from the last checkpoint.
+    Returns True if a new file was downloaded and False if the cached file
+    is current.
+    """
+    url = f"{BASE_URI}/{SOURCES[table][0]}"
+    path = _raw_path(table)
+    part = f"{path}.part"
+    os.makedirs(RAW_DIR, exist_ok=True)
+    state = _read_json(f"{part}.json")
+    if state is not None and not os.path.exists(part):
+        state = None
+    headers = {}
+    if state is not None:
+        # only resume if the file hasn't changed since
+        headers["Range"] = f"bytes={state['received']}-"
+        headers["If-Range"] = state["validator"]
+    elif os.path.exists(path):
+        validators = _read_json(f"{path}.json") or {}
+        if validators.get("etag") is not None:
+            headers["If-None-Match"] = validators["etag"]
+        if validators.get("last_modified") is not None:
+            headers["If-Modified-Since"] = validators["last_modified"]
+
+    session = await http_client.get_session()
+    try:
+        async with session.get(url, headers=headers, timeout=TIMEOUT) as r:
+            if r.status == 304:
+                log.info(IBTRACS_RAW_UNCHANGED.format(table))
+                return False
+            etag = r.headers.get("ETag")
+            last_modified = r.headers.get("Last-Modified")
+            if r.status == 206 and state is not None:
+                received, offset = state["received"], state["offset"]
+                log.info(IBTRACS_RESUMING.format(table, received))
+            else:
+                received = offset = 0
+            expected = _expected_size(r, received)
+            # a partial download can only be resumed if we can tell whether
+            # the file changed in the meantime
+            validator = etag or last_modified
+            async with aiofiles.open(part, "r+b" if offset else "wb") as f:
+                await f.truncate(offset)
+                await f.seek(offset)
+                # every checkpoint ends a gzip member; gzip readers read
+                # consecutive members as one file
+                compressor = zlib.compressobj(RAW_COMPRESSION_LEVEL, zlib.DEFLATED, 31)
+                pending = 0
+                async for chunk in r.content.iter_chunked(CHUNK_SIZE):
+                    await f.write(compressor.compress(chunk))
+                    received += len(chunk)
+                    pending += len(chunk)
+                    if pending >= CHECKPOINT_SIZE and validator is not None:
+                        await f.write(compressor.flush())
+                        await f.flush()
+                        _write_json(
+                            f"{part}.json",
+                            {
+                                "validator": validator,
+                                "received": received,
+                                "offset": await f.tell(),
+                            },
+                        )
+                        compressor = zlib.compressobj(
+                            RAW_COMPRESSION_LEVEL, zlib.DEFLATED, 31
+                        )
+                        pending = 0
+                await f.write(compressor.flush())
+            if expected is not None and received != expected:
+                raise aiohttp.ClientPayloadError(
+                    ERROR_INCOMPLETE_DOWNLOAD.format(received, expected)
+                )
+    except Exception as e:
+        log.exception(ERROR_IBTRACS_UPDATE_FAILURE)
+        if isinstance(e, aiohttp.ClientResponseError) and e.status == 416:
+            # the partial download can't be resumed; start over next time
+            _remove(part, f"{part}.json")
+        raise
+
+    os.replace(part, path)
+    _write_json(
+        f"{path}.json",
+        {"etag": etag, "last_modified": last_modified, "size": received},
+    )
+    _remove(f"{part}.json")
+    return True
+
+
+def _column_defs(schema: str) -> List[Tuple[str, str]]:
+    """(Internal) Get the column names and types of the CREATE TABLE
+    statement in schema.
+    """
+    columns = schema[schema.index("(", schema.index("CREATE TABLE")) + 1 :]
+    return _COLUMN_DEF.findall(columns)
+
+
+def _column_types(schema: str) -> List[str]:
+    """(Internal) Get the column types of the CREATE TABLE statement in schema."""
+    return [col_type for _, col_type in _column_defs(schema)]
+
+
+@dataclass(frozen=True)
+class _Layout:
+    """(Internal) Which columns of a raw CSV file STORE keeps, and how.
+
+    Attributes:
+    columns -- the names of the columns kept
+    types -- their storage types
+    positions -- their positions in the raw CSV rows
+    coded -- whether each of them is stored as codes from CodedValue
+    """
+
+    columns: Tuple[str, ...]
+    types: Tuple[str, ...]
+    positions: Tuple[int, ...]
+    coded: Tuple[bool, ...]
+
+    @classmethod
+    def of(cls, schema: str) -> "_Layout":
+        """Get the layout of a raw CSV file given its schema, and COLUMNS
+        and CODED_COLUMNS.
+        """
+        defs = dict(_column_defs(schema))
+        names = list(defs)
+        columns = names if COLUMNS is None else COLUMNS
+        unknown = [name for name in columns if name not in defs]
+        if unknown:
+            raise ValueError(ERROR_UNKNOWN_COLUMNS.format(", ".join(unknown)))
+        missing = _REQUIRED_COLUMNS.difference(columns)
+        if missing:
+            raise ValueError(ERROR_MISSING_COLUMNS.format(", ".join(sorted(missing))))
+        coded = tuple(name in CODED_COLUMNS for name in columns)
+        return cls(
+            tuple(columns),
+            tuple(
+                "INTEGER" if is_coded else _STORAGE_TYPES[defs[name]]
+                for name, is_coded in zip(columns, coded)
+            ),
+            tuple(names.index(name) for name in columns),
+            coded,
+        )
+
+    @property
+    def create(self) -> str:
+        """The statement that creates STORE."""
+        columns = ", ".join(f"{n} {t}" for n, t in zip(self.columns, self.types))
+        return f"CREATE TABLE IF NOT EXISTS {STORE}({columns})"
+
+    @property
+    def insert(self) -> str:
+        """The statement that inserts the values picked by project()."""
+        values = ", ".join(
+            (
+                "(SELECT CODE FROM CodedValue WHERE VALUE = ?)"
+                if is_coded
+                else "NULLIF(?, ' ')"
+            )
+            for is_coded in self.coded
+        )
+        return f"INSERT INTO {STORE} VALUES({values})"
+
+    def describe(self) -> dict:
+        """Summarize the layout; files with the same summary are stored the
+        same way.
+        """
+        return {
+            "columns": list(self.columns),
+            "coded": [n for n, is_coded in zip(self.columns, self.coded) if is_coded],
+        }
+
+    @property
+    def coded_positions(self) -> Tuple[int, ...]:
+        """The positions in the raw CSV rows of the coded columns."""
+        return tuple(p for p, is_coded in zip(self.positions, self.coded) if is_coded)
+
+
+def _schema_file(table: str) -> str:
+    """(Internal) Where the schema of the raw CSV file of table is."""
+    return f"{PATH}/{SOURCES[table][2]}"
+
+
+def _layout(table: str) -> _Layout:
+    """(Internal) Get the layout of the raw CSV file of table."""
+    with open(_schema_file(table)) as f:
+        return _Layout.of(f.read())
+
+
+def _chunks(path: str) -> Iterator[str]:
+    """(Internal) Yield the lines of a raw CSV file in chunks of
+    IMPORT_BATCH_SIZE lines. The file is compressed with gzip and has
+    headers, which are skipped.
+    """
+    # IBTrACS fields never contain line breaks, so a chunk of lines is a
+    # chunk of rows
+    with gzip.open(path, "rt", encoding="utf-8", newline="") as f:
+        for _ in range(HEADER_LINES):
+            f.readline()
+        while True:
+            lines = list(itertools.islice(f, IMPORT_BATCH_SIZE))
+            if not lines:
+                break
+            yield "".join(lines)
+
+
+def _parse_chunk(
+    text: str,
+    positions: Optional[Tuple[int, ...]],
+    coded_positions: Tuple[int, ...],
+    sids: Optional[Set[str]],
+    fingerprint: bool,
+):
+    """(Internal) Parse a chunk of a raw CSV file. Runs in a parser process.
+
+    Returns a tuple of:
+    - the values at positions of each row, or nothing if positions is None
+    - the values at coded_positions, without blanks
+    - if fingerprint is True, a list of (SID, data) pairs: the data of each
+      run of rows of the same storm, to be added to the storm's fingerprint
+    - the CPU time spent
+    If sids is given, only rows of those storms are parsed.
+    """
+    start = time.process_time()
+    project = None if positions is None else operator.itemgetter(*positions)
+    rows = []
+    codes = set()
+    runs = []
+    sid = None
+    run = []
+    for row in csv.reader(io.StringIO(text, newline="")):
+        if sids is not None and row[0] not in sids:
+            continue
+        if project is not None:
+            rows.append(project(row))
+            codes.update(row[p] for p in coded_positions)
+        if fingerprint:
+            if row[0] != sid:
+                if run:
+                    runs.append((sid, "".join(run).encode()))
+                sid = row[0]
+                run = []
+            run.append("\x1f".join(row) + "\x1e")
+    if run:
+        runs.append((sid, "".join(run).encode()))
+    codes.discard(" ")
+    return rows, codes, runs, time.process_time() - start
+
+
+def _parsed(
+    path: str,
+    pool: Executor,
+    timings: Dict[str, float],
+    layout: Optional[_Layout],
+    *,
+    sids: Optional[Set[str]] = None,
+    fingerprint=True,
+) -> Iterator[tuple]:
+    """(Internal) Parse a raw CSV file in pool and yield the result of
+    _parse_chunk() for each chunk, in order.
+
+    At most PARSE_QUEUE_SIZE chunks are read ahead. If layout is None, no
+    values are picked from the rows.
+    """
+    positions = None if layout is None else layout.positions
+    coded_positions = () if layout is None else layout.coded_positions
+    chunks = _chunks(path)
+    pending = collections.deque()
+
+    def read_ahead():
+        with _timed(timings, "read"):
+            for text in itertools.islice(chunks, PARSE_QUEUE_SIZE - len(pending)):
+                pending.append(
+                    pool.submit(
+                        _parse_chunk,
+                        text,
+                        positions,
+                        coded_positions,
+                        sids,
+                        fingerprint,
+                    )
+                )
+
+    try:
+        read_ahead()
+        while pending:
+            with _timed(timings, "wait"):
+                result = pending.popleft().result()
+            timings["parse"] += result[-1]
+            read_ahead()
+            yield result
+    finally:
+        for future in pending:
+            future.cancel()
+
+
+@contextmanager
+def _timed(timings: Dict[str, float], stage: str):
+    """(Internal) Add the time spent in the with block to timings[stage]."""
+    start = time.perf_counter()
     try:
-        async with aiofiles.open(new_name, "w") as f:
-            await f.writelines(data)
-    # There has to be an except clause before an else clause.
-    except OSError:
-        pass
+        yield
+    finally:
+        timings[stage] += time.perf_counter() - start
+
+
+def _parser_pool() -> ProcessPoolExecutor:
+    """(Internal) Start the processes that parse raw CSV files."""
+    # forking a process that runs threads (like the bot) isn't safe
+    return ProcessPoolExecutor(
+        PARSE_WORKERS, mp_context=multiprocessing.get_context("spawn")
+    )
+
+
+def _import_csv(
+    table: str,
+    schema_file: str,
+    path: str,
+    incremental=False,
+    db: str = None,
+    pool: Optional[Executor] = None,
+):
+    """(Internal) Bring the storms of table in STORE up to date with the
+    contents of path. Blocks; see _csv_import().
+
+    db is the database file to import into (default DB). It is not synced
+    to disk; see _publish(). The file is parsed in pool, or in a new
+    _parser_pool() if pool is None; this thread only writes to db.
+    """
+    if pool is None:
+        with _parser_pool() as pool:
+            return _import_csv(table, schema_file, path, incremental, db, pool)
+    with open(schema_file) as f:
+        layout = _Layout.of(f.read())
+    version = _source_version(path, layout)
+    timings = dict.fromkeys(("read", "parse", "wait", "write", "index"), 0.0)
+    con = sqlite3.connect(db or DB, isolation_level=None)
+    try:
+        con.execute("PRAGMA journal_mode = DELETE")
+        con.execute("PRAGMA synchronous = OFF")
+        con.execute(f"PRAGMA cache_size = -{IMPORT_CACHE_SIZE}")
+        con.execute("PRAGMA temp_store = MEMORY")
+        con.execute("BEGIN")
+        try:
+            con.execute(_DIGEST_SCHEMA)
+            con.execute(_SOURCE_SCHEMA)
+            con.execute(_CODE_SCHEMA)
+            if not _store_matches(con, layout):
+                _drop_store(con)
+            _create_store(con, layout)
+            stored = dict(
+                con.execute(
+                    "SELECT SID, DIGEST FROM StormDigest WHERE SRC = ?", (table,)
+                )
+            )
+            if incremental and stored:
+                _update_rows(con, table, layout, path, stored, pool, timings)
+            else:
+                if incremental:
+                    log.info(IBTRACS_NO_DIGESTS.format(table))
+                _replace_rows(con, table, layout, path, stored, pool, timings)
+            con.execute(
+                "INSERT OR REPLACE INTO RawSource VALUES(?, ?)", (table, version)
+            )
+            con.execute("COMMIT")
+        except BaseException:
+            con.execute("ROLLBACK")
+            raise
+        con.execute("PRAGMA optimize")
+    finally:
+        con.close()
+    log.info(IBTRACS_TIMINGS.format(table=table, workers=PARSE_WORKERS, **timings))
+
+
+def _store_matches(con: sqlite3.Connection, layout: _Layout) -> bool:
+    """(Internal) Check whether the database has STORE, and every table in it
+    was imported with layout. Databases of older versions, which stored each
+    table separately, don't.
+    """
+    kinds = dict(
+        con.execute(
+            "SELECT name, type FROM sqlite_master WHERE name IN (?, ?, ?)",
+            (STORE, *TABLES),
+        )
+    )
+    if kinds.get(STORE) != "table" or "table" in (kinds.get(t) for t in TABLES):
+        return False
+    columns = [
+        (name, col_type)
+        for _, name, col_type, *_ in con.execute(f"PRAGMA table_info({STORE})")
+    ]
+    if columns != list(zip(layout.columns, layout.types)):
+        return False
+    described = layout.describe()
+    for (version,) in con.execute("SELECT VERSION FROM RawSource"):
+        # files imported without their validators by older versions have no
+        # recorded layout; the columns of STORE were checked above
+        if version is not None and json.loads(version).get("layout") != described:
+            return False
+    return True
+
+
+def _drop_store(con: sqlite3.Connection):
+    """(Internal) Delete everything imported into the database, and the
+    records of what it was imported from.
+    """
+    res = con.execute(
+        "SELECT name, type FROM sqlite_master WHERE name IN (?, ?, ?, ?)",
+        (STORE, "StormSummary", *TABLES),
+    )
+    for name, kind in res.fetchall():
+        con.execute(f"DROP {kind.upper()} {name}")
+    con.execute("DELETE FROM StormDigest")
+    con.execute("DELETE FROM RawSource")
+
+
+def _create_store(con: sqlite3.Connection, layout: _Layout):
+    """(Internal) Create STORE, the views of the tables and StormSummary if
+    they don't exist.
+    """
+    con.execute(layout.create)
+    for table, select in _VIEWS.items():
+        con.execute(f"CREATE VIEW IF NOT EXISTS {table} AS {select}")
+    con.execute(_SUMMARY_SCHEMA)
+
+
+def _replace_rows(
+    con: sqlite3.Connection,
+    table: str,
+    layout: _Layout,
+    path: str,
+    stored: Dict[str, bytes],
+    pool: Executor,
+    timings: Dict[str, float],
+):
+    """(Internal) Replace the rows of every storm in path, remove the storms
+    of table that path doesn't have, and index and summarize STORE.
+    """
+    (empty,) = con.execute(f"SELECT NOT EXISTS (SELECT 1 FROM {STORE})").fetchone()
+    if empty:
+        # building indexes after inserting is much faster than keeping them
+        # up to date while inserting
+        for name in INDEXES:
+            con.execute(f"DROP INDEX IF EXISTS {STORE}_{name}")
+    hashes = {}
+    for rows, codes, runs, _ in _parsed(path, pool, timings, layout):
+        with _timed(timings, "write"):
+            if not empty:
+                # rows of storms seen for the first time, which another file
+                # may have written
+                new = dict.fromkeys(sid for sid, _ in runs if sid not in hashes)
+                con.executemany(
+                    f"DELETE FROM {STORE} WHERE SID = ?", ((sid,) for sid in new)
+                )
+            _add_codes(con, codes)
+            con.executemany(layout.insert, rows)
+        _add_runs(runs, hashes)
+    digests = {sid: h.digest() for sid, h in hashes.items()}
+    del hashes
+    with _timed(timings, "index"):
+        _create_indexes(con)
+        _sync(
+            con,
+            table,
+            digests,
+            digests.keys(),
+            stored.keys() - digests.keys(),
+            changed_only=not empty,
+        )
+
+
+def _update_rows(
+    con: sqlite3.Connection,
+    table: str,
+    layout: _Layout,
+    path: str,
+    stored: Dict[str, bytes],
+    pool: Executor,
+    timings: Dict[str, float],
+):
+    """(Internal) Bring the storms of table up to date with path, only
+    touching the rows of storms that changed, are new, or were removed.
+    """
+    hashes = {}
+    for _, _, runs, _ in _parsed(path, pool, timings, None):
+        _add_runs(runs, hashes)
+    digests = {sid: h.digest() for sid, h in hashes.items()}
+    del hashes
+    changed = {sid for sid, digest in digests.items() if stored.get(sid) != digest}
+    removed = stored.keys() - digests.keys()
+    log.info(IBTRACS_INCREMENTAL.format(table, len(changed), len(removed)))
+    con.executemany(f"DELETE FROM {STORE} WHERE SID = ?", ((sid,) for sid in changed))
+    if changed:
+        parsed = _parsed(path, pool, timings, layout, sids=changed, fingerprint=False)
+        for rows, codes, _, _ in parsed:
+            with _timed(timings, "write"):
+                _add_codes(con, codes)
+                con.executemany(layout.insert, rows)
+    with _timed(timings, "index"):
+        _sync(con, table, digests, changed, removed)
+
+
+def _sync(
+    con: sqlite3.Connection,
+    table: str,
+    digests: Dict[str, bytes],
+    written: Iterable[str],
+    removed: Iterable[str],
+    *,
+    changed_only=True,
+):
+    """(Internal) Record the digests of the storms of table that were
+    written, forget the removed ones, delete the rows of storms that no
+    table has anymore, and summarize the storms that changed.
+
+    If changed_only is False, every storm is summarized again.
+    """
+    written = set(written)
+    con.executemany(
+        "DELETE FROM StormDigest WHERE SRC = ? AND SID = ?",
+        ((table, sid) for sid in removed),
+    )
+    con.executemany(
+        "INSERT OR REPLACE INTO StormDigest VALUES(?, ?, ?)",
+        ((table, sid, digests[sid]) for sid in written),
+    )
+    orphans = [
+        sid
+        for sid in removed
+        if con.execute(
+            "SELECT 1 FROM StormDigest WHERE SRC IN (?, ?) AND SID = ?",
+            (*TABLES, sid),
+        ).fetchone()
+        is None
+    ]
+    con.executemany(f"DELETE FROM {STORE} WHERE SID = ?", ((sid,) for sid in orphans))
+    if changed_only:
+        con.execute(_CHANGED_SCHEMA)
+        con.execute("DELETE FROM temp.ChangedStorms")
+        con.executemany(
+            "INSERT INTO temp.ChangedStorms VALUES(?)",
+            ((sid,) for sid in written.union(orphans)),
+        )
+    _summarize(con, changed_only=changed_only)
+
+
+def _add_codes(con: sqlite3.Connection, values: Iterable[str]):
+    """(Internal) Make sure values have codes in CodedValue."""
+    # sorted, so that the codes don't depend on the order of a set
+    con.executemany(
+        "INSERT OR IGNORE INTO CodedValue(VALUE) VALUES(?)",
+        ((value,) for value in sorted(values)),
+    )
+
+
+def _add_runs(runs: Iterable[Tuple[str, bytes]], hashes: dict):
+    """(Internal) Add runs of rows from _parse_chunk() to the running hashes
+    of their storms.
+    """
+    for sid, data in runs:
+        h = hashes.get(sid)
+        if h is None:
+            h = hashes[sid] = hashlib.blake2b(digest_size=16)
+        h.update(data)
+
+
+def _create_indexes(con: sqlite3.Connection):
+    """(Internal) Create missing indexes on STORE and update its statistics."""
+    for name, columns in INDEXES.items():
+        con.execute(
+            f"CREATE INDEX IF NOT EXISTS {STORE}_{name} ON {STORE}({', '.join(columns)})"
+        )
+    con.execute(f"ANALYZE {STORE}")
+
+
+def _summarize(con: sqlite3.Connection, *, changed_only=False):
+    """(Internal) Rebuild StormSummary from STORE.
+
+    If changed_only is True, only the storms in temp.ChangedStorms are
+    rebuilt. Needs the indexes on STORE to run in a reasonable time.
+    """
+    if changed_only:
+        sids = "SID IN (SELECT SID FROM temp.ChangedStorms)"
     else:
-        os.unlink(csv)
+        sids = "1"
+    con.execute(_SUMMARY_SCHEMA)
+    con.execute(f"DELETE FROM StormSummary WHERE {sids}")
+    for query in _PEAK_QUERIES:
+        con.execute(f"""INSERT OR REPLACE INTO StormSummary
+            SELECT SID, SEASON, BASIN, NAME, ATCF_ID, WIND, COALESCE(PRES, 0),
+                TIME, 0
+            FROM ({query.format(table=STORE, sids=sids)})""")
+    # subtropical at peak: the storm was SS or DS, and never TS, when it
+    # had its peak winds (not counting extratropical points)
+    con.execute(f"""UPDATE StormSummary SET SUBTROPICAL = (
+            SELECT COALESCE(
+                MAX(t.NATURE IN ('SS', 'DS')) AND NOT MAX(t.NATURE = 'TS'), 0
+            )
+            FROM {STORE} AS t
+            WHERE t.SID = StormSummary.SID AND t.NATURE IS NOT 'ET'
+                AND (t.WMO_WIND = StormSummary.PEAK_WIND
+                    OR t.USA_WIND = StormSummary.PEAK_WIND)
+        )
+        WHERE PEAK_WIND != 0 AND {sids}""")
+    con.execute("ANALYZE StormSummary")
+
+
+def generation() -> Optional[Tuple[int, int]]:
+    """Identify the current version of the database, or return None if
+    there is none.
+
+    Updates never modify the database in place: they build a new one and
+    replace the old one with it, so the returned value changes after every
+    update. Connections that are already open keep reading the version they
+    opened.
+    """
+    try:
+        stat = os.stat(DB)
+    except FileNotFoundError:
+        return None
+    return stat.st_ino, stat.st_mtime_ns
+
+
+def _open_shadow(copy=True) -> str:
+    """(Internal) Create the file that the next version of the database is
+    built in and return its path. Blocks.
+
+    Every build gets a file of its own, so that a build can never publish
+    another one's work. If copy is True, the file starts as a copy of the
+    current database.
+    """
+    _remove_stale_shadows()
+    fd, shadow = tempfile.mkstemp(
+        prefix=f"{os.path.basename(DB)}.", suffix=".new", dir=os.path.dirname(DB)
+    )
+    os.close(fd)
+    if os.path.exists(DB):
+        _leave_wal()
+    if copy and os.path.exists(DB):
+        log.info(IBTRACS_COPYING_DB.format(shadow))
+        src = sqlite3.connect(DB, timeout=60)
+        dst = sqlite3.connect(shadow)
+        try:
+            src.backup(dst)
+        finally:
+            dst.close()
+            src.close()
+    return shadow
+
+
+def _remove_stale_shadows():
+    """(Internal) Delete the files of interrupted builds. Blocks.
+
+    Builds of other processes may be running, so only files that haven't
+    been written to for STALE_SHADOW_AGE seconds are deleted.
+    """
+    directory, name = os.path.split(DB)
+    # the name used before every build had its own
+    leftovers = [f"{name}.new"]
+    leftovers += [
+        entry
+        for entry in os.listdir(directory)
+        if entry.startswith(f"{name}.") and entry.endswith(".new")
+    ]
+    now = time.time()
+    for leftover in set(leftovers):
+        path = os.path.join(directory, leftover)
+        try:
+            if now - os.path.getmtime(path) < STALE_SHADOW_AGE:
+                continue
+        except FileNotFoundError:
+            continue
+        _remove(path, f"{path}-journal")
+
+
+def _leave_wal():
+    """(Internal) Take the current database out of WAL mode. Blocks.
+
+    Older versions kept the database in WAL mode, and SQLite would apply
+    the WAL file of the old database to the one that replaces it. Leaving
+    WAL mode deletes the file. This does nothing if the database isn't in
+    WAL mode.
+    """
+    con = sqlite3.connect(DB, timeout=60)
+    try:
+        (mode,) = con.execute("PRAGMA journal_mode = DELETE").fetchone()
+    except sqlite3.OperationalError as e:
+        raise sqlite3.OperationalError(ERROR_DB_IN_USE.format(DB)) from e
+    finally:
+        con.close()
+    if mode == "wal":
+        raise sqlite3.OperationalError(ERROR_DB_IN_USE.format(DB))
+
+
+def _publish(shadow: str):
+    """(Internal) Replace the current database with shadow. Blocks."""
+    fd = os.open(shadow, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+    os.replace(shadow, DB)
+    log.info(IBTRACS_PUBLISHED.format(generation()))
+    # don't keep the old file open any longer than needed
+    _close_pool()
+
+
+def _connect_ro() -> sqlite3.Connection:
+    """(Internal) Open a read-only connection to the current database."""
+    con = sqlite3.connect(
+        f"file:{urllib.parse.quote(DB)}?mode=ro",
+        uri=True,
+        check_same_thread=False,
+        cached_statements=CACHED_STATEMENTS,
+    )
+    con.execute(f"PRAGMA mmap_size = {READ_MMAP_SIZE}")
+    con.execute(f"PRAGMA cache_size = -{READ_CACHE_SIZE}")
+    return con
+
+
+@contextmanager
+def _reader() -> Iterator[sqlite3.Connection]:
+    """(Internal) Borrow a read-only connection to the current database.
+
+    Connections are pooled, so that their page caches and prepared statements
+    are reused across queries. The pool is emptied when a new generation of
+    the database is published; connections borrowed before that keep reading
+    the old one.
+    """
+    global _pool_generation
+    current = generation()
+    if current is None:
+        raise FileNotFoundError(ERROR_MISSING_IBTRACS_DB)
+    with _pool_lock:
+        if current != _pool_generation:
+            _close_pool_locked()
+            _pool_generation = current
+        con = _pool.pop() if _pool else None
+    if con is None:
+        con = _connect_ro()
+    query = _current_query.get()
+    try:
+        if query is not None:
+            query.attach(con)
+        yield con
+    finally:
+        if query is not None:
+            query.detach()
+        with _pool_lock:
+            # connections opened before the last swap may read the old file
+            if current == _pool_generation and len(_pool) < POOL_SIZE:
+                _pool.append(con)
+                con = None
+        if con is not None:
+            con.close()
+
+
+def _close_pool_locked():
+    while _pool:
+        _pool.pop().close()
+
+
+def _close_pool():
+    """(Internal) Close the pooled connections."""
+    global _pool_generation
+    with _pool_lock:
+        _close_pool_locked()
+        _pool_generation = None
+
+
+def updating() -> bool:
+    """Check whether this process is updating, rebuilding or indexing the
+    database, including builds whose update_db() call was cancelled.
+    """
+    return _update_lock.locked()
+
+
+@asynccontextmanager
+async def _exclusive():
+    """(Internal) Hold _update_lock without blocking the event loop.
+
+    If the block started a build that is still running when it exits, e.g.
+    because the task was cancelled, the lock is released when the build is
+    done rather than right away.
+    """
+    global _build
+    while not _update_lock.acquire(blocking=False):
+        await asyncio.sleep(UPDATE_POLL_INTERVAL)
+    try:
+        yield
     finally:
-        # free up RAM
-        del data, lines
-
-
-async def _csv_import(table: Literal["LastThreeYears", "AllBestTrack"]):
-    """(Internal) Import CSV into table."""
-    with sqlite3.connect(DB) as con:
-        cur = con.cursor()
-        if table == "LastThreeYears":
-            async with aiofiles.open(f"{PATH}/ibtracs_LAST3.sql") as f:
-                cur.executescript(await f.read())
-            filename = "ibtracs_last3_NO_HEADING.csv"
+        build, _build = _build, None
+        if build is None:
+            _update_lock.release()
         else:
-            async with aiofiles.open(f"{PATH}/ibtracs_ALL.sql") as f:
-                cur.executescript(await f.read())
-            filename = "ibtracs_all_NO_HEADING.csv"
-
-        async with aiofiles.open(f"{PATH}/{filename}") as data:
-            async for line in data:
-                values = line.split(",")
-                for i, v in enumerate(values):
-                    if "." in v:
-                        try:
-                            values[i] = float(v)
-                        except ValueError:
-                            pass
-                    else:
-                        try:
-                            values[i] = int(v)
-                        except ValueError:
-                            pass
-                cur.execute(
-                    f"INSERT INTO {table} VALUES({'?, ' * (len(values) - 1)}?)", values
-                )
-        con.commit()
+            # called right away if the build is already done
+            build.add_done_callback(lambda _: _update_lock.release())
+
+
+async def _run_build(func, *args, **kwargs):
+    """(Internal) Run the build func(*args, **kwargs) in its own thread.
+
+    Must be called in an _exclusive() block, which keeps other updates out
+    until the build is done even if the caller is cancelled.
+    """
+    global _builder, _build
+    if _builder is None:
+        _builder = ThreadPoolExecutor(1, "ibtracs-build")
+    _build = _builder.submit(func, *args, **kwargs)
+    await asyncio.wrap_future(_build)
+
+
+def _rebuild(func, *args, copy=True):
+    """(Internal) Call func with the path of a new copy of the database
+    followed by args, then replace the database with the copy. Blocks.
+
+    If func raises, the copy is discarded and the database is left as is.
+    """
+    shadow = _open_shadow(copy)
+    try:
+        func(shadow, *args)
+        _publish(shadow)
+    except BaseException:
+        _remove(shadow, f"{shadow}-journal")
+        raise
+
+
+def _index_shadow(shadow: str):
+    con = sqlite3.connect(shadow)
+    try:
+        with con:
+            # summaries of tables stored separately, or with blanks instead
+            # of NULLs, would be wrong
+            con.execute(_SOURCE_SCHEMA)
+            if not _store_matches(con, _layout(TABLES[0])):
+                raise sqlite3.OperationalError(ERROR_REIMPORT_NEEDED)
+            log.info(IBTRACS_INDEXING.format(STORE))
+            _create_indexes(con)
+            _summarize(con)
+    finally:
+        con.close()
+
+
+def index_db():
+    """Create missing indexes and storm summaries, and update statistics.
+
+    Databases imported by update_db() are already indexed and summarized.
+    Databases imported by older versions, or with other COLUMNS, have to be
+    imported again instead.
+    """
+    with _update_lock:
+        if not os.path.exists(DB):
+            raise FileNotFoundError(ERROR_MISSING_IBTRACS_DB)
+        _rebuild(_index_shadow)
+
+
+def _import_tables(shadow: str, tables: List[str], incremental: bool):
+    with _parser_pool() as pool:
+        for table in tables:
+            _import_csv(
+                table,
+                _schema_file(table),
+                _raw_path(table),
+                incremental,
+                shadow,
+                pool,
+            )
+    _compact(shadow)
+
+
+def _compact(db: str):
+    """(Internal) Rewrite db if much of it is free space, e.g. after it was
+    imported again with fewer columns. Blocks.
+    """
+    con = sqlite3.connect(db, isolation_level=None)
+    try:
+        (free,) = con.execute("PRAGMA freelist_count").fetchone()
+        (pages,) = con.execute("PRAGMA page_count").fetchone()
+        if free > pages * VACUUM_THRESHOLD:
+            log.info(IBTRACS_COMPACTING.format(free * 100 // pages))
+            con.execute("VACUUM")
+    finally:
+        con.close()
+
+
+async def _csv_import(
+    tables: List[Literal["LastThreeYears", "AllBestTrack"]], incremental=False
+):
+    """(Internal) Import the cached raw CSV files of tables into a new copy
+    of the database, then replace the database with it.
+
+    Until then, readers keep seeing the old database. If incremental is
+    True, only the rows of storms that changed are replaced, if the table
+    was fully imported before. If STORE has to be imported again (see
+    _needs_full_import()), tables must be all of TABLES. Must be called in
+    an _exclusive() block.
+    """
+    # nothing needs to be copied if every table is imported from scratch
+    copy = incremental or set(tables) != set(TABLES)
+    start = time.perf_counter()
+    await _run_build(_rebuild, _import_tables, tables, incremental, copy=copy)
+    log.info(IBTRACS_BUILD_TIME.format(time.perf_counter() - start))
+
+
+def _source_version(path: str, layout: _Layout) -> str:
+    """(Internal) Identify what importing a cached raw CSV file with layout
+    produces: the version of the file and the layout.
+
+    If the validators saved with the file are missing, e.g. because they
+    were deleted, the version of the file is unknown but the layout is still
+    recorded. _download_raw() always saves them, so such a version never
+    matches the file after an update.
+    """
+    version = _read_json(f"{path}.json") or {}
+    return json.dumps({**version, "layout": layout.describe()}, sort_keys=True)
+
+
+def _imported_version(table: str) -> Optional[str]:
+    """(Internal) Identify the raw CSV file and columns that table was
+    imported from, or return None if they're unknown.
+    """
+    if not os.path.exists(DB):
+        return None
+    con = sqlite3.connect(DB)
+    try:
+        res = con.execute("SELECT VERSION FROM RawSource WHERE SRC = ?", (table,))
+        row = res.fetchone()
+        return None if row is None else row[0]
+    except sqlite3.OperationalError:
+        return None
+    finally:
+        con.close()
+
+
+def _needs_full_import() -> bool:
+    """(Internal) Check whether every table has to be imported from scratch
+    before any of them can be updated: the database was imported by an older
+    version, or with other COLUMNS.
+    """
+    if not os.path.exists(DB):
+        return False
+    con = sqlite3.connect(DB)
+    try:
+        return not _store_matches(con, _layout(TABLES[0]))
+    except sqlite3.OperationalError:
+        # no RawSource
+        return True
+    finally:
+        con.close()
+
+
+def _tables(mode: str) -> List[str]:
+    """(Internal) Get the tables affected by an update mode."""
+    tables = []
+    # the storms of the last three years are written last, so that their
+    # rows come from their own file
+    if mode == "all" or mode == "full":
+        tables.append("AllBestTrack")
+    if mode == "last3" or mode == "full":
+        tables.append("LastThreeYears")
+    if not tables:
+        raise ValueError(ERROR_ILLEGAL_UPDATE_MODE.format(mode))
+    return tables
 
 
-async def update_db(mode="last3"):
+async def update_db(mode="last3", *, incremental=True):
     """Update the best track database.
 
     Arguments:
@@ -211,99 +1435,93 @@ async def update_db(mode="last3"):
     If mode == "last3", update the table LastThreeYears.
     If mode == "all", update the table AllBestTrack.
     If mode == "full", update both tables.
+    Keyword arguments:
+    incremental -- only replace storms whose track changed, and delete
+    storms that were removed (default True). Tables are imported from
+    scratch if this is False or if they have never been fully imported.
+    Files that haven't changed on the server since the last update are not
+    downloaded again, and their tables are not updated unless incremental
+    is False.
+    The tables are updated in a new copy of the database, which replaces
+    the current one when every table is done; until then, get_storm() keeps
+    reading the current one.
+    Both tables are stored together (see STORE). If the database was
+    imported by an older version or with other COLUMNS, both are imported
+    from scratch whatever mode is.
+    Only one update, rebuild() or index_db() runs at a time; the others
+    wait for it to finish (see updating()).
     """
     locale_init()
-    get_last3 = mode == "last3" or mode == "full"
-    get_all = mode == "all" or mode == "full"
-    if not (get_last3 or get_all):
-        raise ValueError(ERROR_ILLEGAL_UPDATE_MODE.format(mode))
-    if mode == "last3":
-        log.info(IBTRACS_UPDATE_LAST3)
-    elif mode == "all":
-        log.info(IBTRACS_UPDATE_ALL)
-    else:
-        log.info(IBTRACS_UPDATE_FULL)
-    log.info(IBTRACS_GETTING_DATA)
-    if get_last3:
-        csv = "ibtracs_last3.csv"
-        async with aiohttp.ClientSession(
-            timeout=aiohttp.ClientTimeout(connect=10), raise_for_status=True
-        ) as session:
-            r = await session.get(f"{BASE_URI}/ibtracs.last3years.list.v04r00.csv")
-            try:
-                async with aiofiles.open(f"{PATH}/{csv}", "w") as f:
-                    await f.write(await r.text())
-            except Exception:
-                log.exception(ERROR_IBTRACS_UPDATE_FAILURE)
-                raise
-            finally:
-                # Calling close does not delete the object.
-                # We want to delete the resource afterwards to save RAM
-                # because we may be working with a large amount of data.
-                r.close()
-                del r
-        await _remove_headers(f"{PATH}/{csv}")
-        await _csv_import("LastThreeYears")
-        os.unlink(f"{PATH}/ibtracs_last3_NO_HEADING.csv")
-    if get_all:
-        csv = "ibtracs_all.csv"
-        async with aiohttp.ClientSession(
-            timeout=aiohttp.ClientTimeout(connect=10), raise_for_status=True
-        ) as session:
-            r = await session.get(f"{BASE_URI}/ibtracs.ALL.list.v04r00.csv")
-            try:
-                async with aiofiles.open(f"{PATH}/{csv}", "w") as f:
-                    await f.write(await r.text())
-            except Exception:
-                log.exception(ERROR_IBTRACS_UPDATE_FAILURE)
-                raise
-            finally:
-                # Calling close does not delete the object.
-                # We want to delete the resource afterwards to save RAM
-                # because we may be working with a large amount of data.
-                del r
-        await _remove_headers(f"{PATH}/{csv}")
-        await _csv_import("AllBestTrack")
-        os.unlink(f"{PATH}/ibtracs_all_NO_HEADING.csv")
-    log.info(IBTRACS_UPDATE_SUCCESS)
+    async with _exclusive():
+        tables = _tables(mode)
+        if _needs_full_import():
+            log.info(IBTRACS_NEW_COLUMNS)
+            mode, tables, incremental = "full", _tables("full"), False
+        if mode == "last3":
+            log.info(IBTRACS_UPDATE_LAST3)
+        elif mode == "all":
+            log.info(IBTRACS_UPDATE_ALL)
+        else:
+            log.info(IBTRACS_UPDATE_FULL)
+        log.info(IBTRACS_GETTING_DATA)
+        start = time.perf_counter()
+        downloads = [asyncio.ensure_future(_download_raw(table)) for table in tables]
+        try:
+            await asyncio.gather(*downloads)
+        except BaseException:
+            for download in downloads:
+                download.cancel()
+            raise
+        log.info(IBTRACS_DOWNLOAD_TIME.format(time.perf_counter() - start))
+        pending = []
+        for table in tables:
+            # compare with the database rather than trusting _download_raw(),
+            # in case the last import failed after the file was downloaded
+            version = _imported_version(table)
+            if (
+                not incremental
+                or version is None
+                or version != _source_version(_raw_path(table), _layout(table))
+            ):
+                pending.append(table)
+            else:
+                log.info(IBTRACS_UP_TO_DATE.format(table))
+        if pending:
+            await _csv_import(pending, incremental)
+        log.info(IBTRACS_UPDATE_SUCCESS)
 
 
-async def init_db():
-    """Equivalent to :func:`update_db("full")`"""
-    await update_db("full")
+async def rebuild(mode="full"):
+    """Rebuild the best track database from the cached raw CSV files,
+    without downloading anything.
 
+    Arguments:
+    mode -- Table(s) to rebuild (default "full"); see update_db()
+    """
+    locale_init()
+    async with _exclusive():
+        tables = _tables(mode)
+        if _needs_full_import():
+            log.info(IBTRACS_NEW_COLUMNS)
+            tables = _tables("full")
+        for table in tables:
+            if not os.path.exists(_raw_path(table)):
+                raise FileNotFoundError(ERROR_NO_RAW_DATA.format(_raw_path(table)))
+        for table in tables:
+            log.info(IBTRACS_REBUILDING.format(table))
+        await _csv_import(tables)
+        log.info(IBTRACS_UPDATE_SUCCESS)
 
-def get_storm(
-    *,
-    name=None,
-    season: int = 0,
-    basin=None,
-    atcf_id=None,
-    ibtracs_id=None,
-    table=None,
-    lang="C",
-):
-    """Find a TC and return either a query_group() or a Storm().
 
-    If only one storm is found, return a Storm() object.
-    If more than one storm is found, return a query_group() object.
-    Keyword arguments:
-    name -- Filter by name (default None)
-    season -- Filter by year (default 0)
-    basin -- Filter by basin (default None)
-    basin can be one of "NA", "SA", "NI", "SI", "SP", "EP", or "WP".
-    atcf_id -- Filter by ATCF ID (default None)
-    ibtracs_id -- Filter by IBTrACS ID (default None)
-    table -- Set preferred database table (default "LastThreeYears")
-    table can be one of "LastThreeYears" or "AllBestTrack".
-    At least one of the above keyword arguments (except for table) must be
-    specified by the user.
-    """
-    set_locale(lang)
-    if not os.path.exists(DB):
-        raise FileNotFoundError(ERROR_MISSING_IBTRACS_DB)
-    if table is not None and table not in ["LastThreeYears", "AllBestTrack"]:
-        raise ValueError(ERROR_INVALID_TABLE.format(table))
+async def init_db():
+    """Equivalent to :func:`update_db("full", incremental=False)`"""
+    await update_db("full", incremental=False)
+
+
+def _conditions(
+    *, name=None, season: int = 0, basin=None, atcf_id=None, ibtracs_id=None
+) -> Tuple[str, list]:
+    """(Internal) Build the WHERE clause and parameters of get_storm()."""
     conds_buff = io.StringIO()
     params = []
     if isinstance(basin, str):
@@ -338,61 +1556,432 @@ def get_storm(
         raise ValueError(ERROR_NO_PARAMS)
     conds = conds_buff.getvalue()
     conds_buff.close()
-    con = sqlite3.connect(DB)
-    cur = con.cursor()
+    return conds, params
+
+
+def get_storm(
+    *,
+    name=None,
+    season: int = 0,
+    basin=None,
+    atcf_id=None,
+    ibtracs_id=None,
+    table=None,
+    lang="C",
+):
+    """Find a TC and return either a query_group() or a Storm().
+
+    If only one storm is found, return a Storm() object.
+    If more than one storm is found, return a query_group() object.
+    Keyword arguments:
+    name -- Filter by name (default None)
+    season -- Filter by year (default 0)
+    basin -- Filter by basin (default None)
+    basin can be one of "NA", "SA", "NI", "SI", "SP", "EP", or "WP".
+    atcf_id -- Filter by ATCF ID (default None)
+    ibtracs_id -- Filter by IBTrACS ID (default None)
+    table -- Set preferred database table (default "LastThreeYears")
+    table can be one of "LastThreeYears" or "AllBestTrack".
+    At least one of the above keyword arguments (except for table) must be
+    specified by the user.
+    The results of the last CACHE_SIZE queries are cached until a new
+    database is published; see cache_stats().
+    """
+    set_locale(lang)
+    if table is not None and table not in ["LastThreeYears", "AllBestTrack"]:
+        raise ValueError(ERROR_INVALID_TABLE.format(table))
+    conds, params = _conditions(
+        name=name, season=season, basin=basin, atcf_id=atcf_id, ibtracs_id=ibtracs_id
+    )
     if table is None:
         table = "LastThreeYears"
     log.debug(IBTRACS_CONDS.format(conds))
-    res = cur.execute(
-        f"SELECT SID, SEASON, BASIN, NAME FROM {table} WHERE {conds}", params
-    )
-    data = res.fetchall()
-    if not data:
-        table = "AllBestTrack"
-        res = cur.execute(
-            f"SELECT SID, SEASON, BASIN, NAME FROM AllBestTrack WHERE {conds}", params
-        )
-        data = res.fetchall()
-        if not data:
-            return None
-    storms = sorted(set(data))  # Deduplicate and sort data
-    sid = storms[0][0]
+    # _conditions() normalizes the filters
+    key = (table, conds, *params)
+    current = generation()
+    storms = _cache_get(key, current)
+    if storms is None:
+        with _reader() as con:
+            storms = tuple(_find_storms(con, table, conds, params))
+        _cache_put(key, storms, current)
+    if not storms:
+        return None
     if len(storms) > 1:
-        for storm in storms:
-            if sid not in storm:
-                con.close()
-                return query_group(storms)
-    params = [sid]
-    res = cur.execute(
-        f"SELECT USA_ATCF_ID, BASIN, MAX(USA_WIND), USA_PRES, ISO_TIME, NAME, SEASON FROM {table} WHERE SID = ? AND USA_WIND != ' ' AND NATURE != 'ET'",
-        params,
+        return query_group(storm[:4] for storm in storms)
+    return _storm(storms[0])
+
+
+def get_storms(ids: Iterable[str], *, table=None, lang="C") -> List[Optional[Storm]]:
+    """Find several TCs by ID at once.
+
+    Returns a list with one item per ID, in the same order: a Storm()
+    object, or None if no storm, or more than one, has that ID. The IDs
+    that aren't cached (see get_storm()) are looked up with a single query.
+    Arguments:
+    ids -- IBTrACS IDs, ATCF IDs, or both
+    Keyword arguments:
+    table -- Set preferred database table (default "LastThreeYears")
+    table can be one of "LastThreeYears" or "AllBestTrack".
+    """
+    set_locale(lang)
+    if table is not None and table not in ["LastThreeYears", "AllBestTrack"]:
+        raise ValueError(ERROR_INVALID_TABLE.format(table))
+    if table is None:
+        table = "LastThreeYears"
+    ids = [id_.upper() for id_ in ids]
+    # the keys get_storm(ibtracs_id=...) and get_storm(atcf_id=...) use
+    keys = {
+        id_: (table, "SID = ?" if _SID.fullmatch(id_) else "USA_ATCF_ID = ?", id_)
+        for id_ in ids
+    }
+    current = generation()
+    found = {}
+    for id_, key in keys.items():
+        storms = _cache_get(key, current)
+        if storms is not None:
+            found[id_] = storms
+    missing = [id_ for id_ in keys if id_ not in found]
+    if missing:
+        sids = [id_ for id_ in missing if keys[id_][1] == "SID = ?"]
+        atcf_ids = [id_ for id_ in missing if keys[id_][1] != "SID = ?"]
+        with _reader() as con:
+            matches = _find_storms_by_id(con, table, sids, atcf_ids)
+        for id_ in missing:
+            found[id_] = tuple(matches.get(id_, ()))
+            _cache_put(keys[id_], found[id_], current)
+    return [_storm(found[id_][0]) if len(found[id_]) == 1 else None for id_ in ids]
+
+
+def get_storm_page(
+    *,
+    name=None,
+    season: int = 0,
+    basin=None,
+    atcf_id=None,
+    ibtracs_id=None,
+    table=None,
+    after: Optional[str] = None,
+    before: Optional[str] = None,
+    limit: int = PAGE_SIZE,
+    lang="C",
+) -> Page:
+    """Find TCs one page at a time and return a Page().
+
+    Only the storms on the page are read from the database, so searches
+    that match many storms take as long as those that match few.
+    Keyword arguments:
+    name, season, basin, atcf_id, ibtracs_id, table -- see get_storm()
+    after -- Start after the storm with this IBTrACS ID (default None), e.g.
+    the last storm of the previous page
+    before -- End before the storm with this IBTrACS ID (default None), e.g.
+    the first storm of the next page
+    limit -- Storms per page (default PAGE_SIZE)
+    Pages are cached like the results of get_storm().
+    """
+    set_locale(lang)
+    if table is not None and table not in ["LastThreeYears", "AllBestTrack"]:
+        raise ValueError(ERROR_INVALID_TABLE.format(table))
+    if after is not None and before is not None:
+        raise ValueError(ERROR_TWO_CURSORS)
+    if not isinstance(limit, int) or limit < 1:
+        raise ValueError(ERROR_INVALID_PAGE_SIZE.format(limit))
+    conds, params = _conditions(
+        name=name, season=season, basin=basin, atcf_id=atcf_id, ibtracs_id=ibtracs_id
     )
-    atcf_id, basin, wind, pres, time, name, season = res.fetchone()
-    if pres == " ":
-        params = [sid, time]
-        res = cur.execute(
-            f"SELECT WMO_PRES FROM {table} WHERE SID = ? and ISO_TIME = ?", params
-        )
-        pres = res.fetchone()[0]
-    if name is None:
-        params = [sid]
-        res = cur.execute(
-            f"SELECT USA_ATCF_ID, BASIN, MAX(WMO_WIND), WMO_PRES, ISO_TIME, NAME, SEASON FROM {table} WHERE SID = ? AND WMO_WIND != ' '",
-            params,
-        )
-        atcf_id, basin, wind, pres, time, name, season = res.fetchone()
-        if name is None:
-            res = cur.execute(
-                f"SELECT USA_ATCF_ID, BASIN, MAX(USA_SSHS), WMO_PRES, ISO_TIME, NAME, SEASON FROM {table} WHERE SID = params"
+    if table is None:
+        table = "LastThreeYears"
+    log.debug(IBTRACS_CONDS.format(conds))
+    key = ("page", table, conds, *params, after, before, limit)
+    current = generation()
+    storms = _cache_get(key, current)
+    if storms is None:
+        with _reader() as con:
+            storms = tuple(
+                _find_page(con, table, conds, params, after, before, limit + 1)
             )
-            atcf_id, basin, sshs, pres, time, name, season = res.fetchone()
-            wind = 0
-    if pres == " ":
-        pres = 0
-    if atcf_id == " ":
-        atcf_id = None
-    con.close()
-    return Storm(atcf_id, basin, wind, pres, time, name, sid, season)
+        _cache_put(key, storms, current)
+    # one more storm than needed is read, to tell if there are more
+    more = len(storms) > limit
+    if before is not None:
+        return Page(tuple(map(_storm, storms[-limit:])), more, True)
+    return Page(tuple(map(_storm, storms[:limit])), after is not None, more)
+
+
+async def aget_storm_page(*, timeout: Optional[float] = QUERY_TIMEOUT, **kwargs):
+    """Like get_storm_page(), but run the query in a worker thread; see
+    aget_storm().
+    """
+    return await _query(get_storm_page, timeout=timeout, **kwargs)
+
+
+def iter_storms(*, limit: int = PAGE_SIZE, **kwargs) -> Iterator[Storm]:
+    """Yield every TC that get_storm_page() finds, sorted by IBTrACS ID.
+
+    The storms are read from the database limit at a time (default
+    PAGE_SIZE), as they're needed. The keyword arguments are those of
+    get_storm_page().
+    """
+    after = None
+    while True:
+        page = get_storm_page(after=after, limit=limit, **kwargs)
+        yield from page.storms
+        if not page.has_next:
+            return
+        after = page.storms[-1].best_track_id
+
+
+def _storm(summary: tuple) -> Storm:
+    """(Internal) Make a Storm() out of a row of StormSummary."""
+    sid, season, basin, name, atcf_id, wind, pres, peak, subtropical = summary
+    return Storm(atcf_id, basin, wind, pres, peak, name, sid, season, bool(subtropical))
+
+
+def _cache_get(key: tuple, current: Optional[Tuple[int, int]]) -> Optional[tuple]:
+    """(Internal) Get the cached storms found by the get_storm() query key,
+    or None if they aren't cached. The cache is emptied if current isn't
+    the generation it was filled from.
+    """
+    global _cache_generation
+    if CACHE_SIZE <= 0:
+        return None
+    with _cache_lock:
+        if current != _cache_generation:
+            _cache.clear()
+            _cache_generation = current
+        storms = _cache.get(key)
+        if storms is None:
+            _cache_stats["misses"] += 1
+        else:
+            _cache.move_to_end(key)
+            _cache_stats["hits"] += 1
+        return storms
+
+
+def _cache_put(key: tuple, storms: tuple, current: Optional[Tuple[int, int]]):
+    """(Internal) Cache the storms found by the get_storm() query key in
+    generation current, evicting the least recently used results if there
+    are more than CACHE_SIZE.
+    """
+    with _cache_lock:
+        # a new database was published while the query ran
+        if current != _cache_generation or CACHE_SIZE <= 0:
+            return
+        _cache[key] = storms
+        while len(_cache) > CACHE_SIZE:
+            _cache.popitem(last=False)
+            _cache_stats["evictions"] += 1
+
+
+def cache_stats() -> Dict[str, int]:
+    """Get the number of get_storm() results cached and the maximum
+    (CACHE_SIZE), and the number of cache hits, misses and evictions.
+    """
+    with _cache_lock:
+        return {**_cache_stats, "size": len(_cache), "max_size": CACHE_SIZE}
+
+
+class _Query:
+    """(Internal) A query running in a worker thread, which the event loop
+    can interrupt.
+    """
+
+    def __init__(self):
+        self.cancelled = False
+        self._con: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    def attach(self, con: sqlite3.Connection):
+        """Start using con."""
+        with self._lock:
+            if self.cancelled:
+                raise sqlite3.OperationalError(ERROR_QUERY_CANCELLED)
+            self._con = con
+
+    def detach(self):
+        """Stop using the connection."""
+        with self._lock:
+            self._con = None
+
+    def cancel(self):
+        """Abort the statement running on the connection in use, if any."""
+        with self._lock:
+            self.cancelled = True
+            if self._con is not None:
+                self._con.interrupt()
+
+
+_current_query: "ContextVar[Optional[_Query]]" = ContextVar(
+    "_current_query", default=None
+)
+
+
+def _run_query(query: _Query, func, args, kwargs):
+    token = _current_query.set(query)
+    try:
+        return func(*args, **kwargs)
+    finally:
+        _current_query.reset(token)
+
+
+async def _query(func, *args, timeout: Optional[float], **kwargs):
+    """(Internal) Call func in a worker thread and return what it returns.
+
+    If the call takes longer than timeout seconds, or the calling task is
+    cancelled, the SQLite statement it's running is interrupted.
+    """
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(QUERY_WORKERS, "ibtracs-query")
+    query = _Query()
+    future = asyncio.get_running_loop().run_in_executor(
+        _executor, _run_query, query, func, args, kwargs
+    )
+    try:
+        return await asyncio.wait_for(future, timeout)
+    except asyncio.TimeoutError:
+        # not the built-in TimeoutError before Python 3.11
+        query.cancel()
+        raise asyncio.TimeoutError(ERROR_QUERY_TIMED_OUT.format(timeout)) from None
+    except asyncio.CancelledError:
+        query.cancel()
+        raise
+
+
+async def aget_storm(*, timeout: Optional[float] = QUERY_TIMEOUT, **kwargs):
+    """Like get_storm(), but run the query in a worker thread.
+
+    Keyword arguments:
+    timeout -- Seconds to wait for the query (default QUERY_TIMEOUT), or None
+    to wait indefinitely
+    The other keyword arguments are those of get_storm().
+    Raises asyncio.TimeoutError if the query takes too long. Queries are interrupted
+    if they time out or the calling task is cancelled.
+    """
+    return await _query(get_storm, timeout=timeout, **kwargs)
+
+
+def _search(con: sqlite3.Connection, sql: str, params) -> List[tuple]:
+    """(Internal) Run a query on StormSummary and STORE and return the rows,
+    explaining errors caused by databases of older versions.
+    """
+    try:
+        return con.execute(sql, params).fetchall()
+    except sqlite3.OperationalError as e:
+        if "StormSummary" in str(e) or STORE in str(e):
+            raise sqlite3.OperationalError(ERROR_OUTDATED_IBTRACS_DB) from e
+        raise
+
+
+def _preferred(table: str, storms: List[tuple]) -> List[tuple]:
+    """(Internal) Drop the last column of storms, which tells whether each
+    storm is in LastThreeYears. If table is LastThreeYears, and some of the
+    storms are in it, only those are kept.
+    """
+    if table == "LastThreeYears" and any(storm[-1] for storm in storms):
+        storms = [storm for storm in storms if storm[-1]]
+    return [storm[:-1] for storm in storms]
+
+
+def _storms_sql(conds: str) -> str:
+    """(Internal) Build the query of _find_storms(). Its parameters are
+    those of conds.
+    """
+    return f"""SELECT SID, SEASON, BASIN, NAME, ATCF_ID, PEAK_WIND, PEAK_PRES,
+            PEAK_TIME, SUBTROPICAL, {_RECENT}
+        FROM StormSummary
+        WHERE SID IN (SELECT SID FROM {STORE} WHERE {conds})
+        ORDER BY SID"""
+
+
+def _recent_sql(conds: str) -> str:
+    """(Internal) Build the query that tells _find_page() whether a storm
+    of LastThreeYears has a point matching conds.
+    """
+    return f"SELECT EXISTS (SELECT 1 FROM LastThreeYears WHERE {conds})"
+
+
+def _page_sql(conds: str, *, recent: bool, after: bool, before: bool) -> str:
+    """(Internal) Build the query of _find_page(). Its parameters are those
+    of conds, then the cursor if after or before is True, then the number of
+    storms. If recent is True, only storms of LastThreeYears are selected.
+    """
+    filters = ""
+    if recent:
+        filters += f" AND {_RECENT}"
+    if after:
+        filters += " AND SID > ?"
+    elif before:
+        filters += " AND SID < ?"
+    return f"""SELECT SID, SEASON, BASIN, NAME, ATCF_ID, PEAK_WIND, PEAK_PRES,
+            PEAK_TIME, SUBTROPICAL
+        FROM StormSummary
+        WHERE SID IN (SELECT SID FROM {STORE} WHERE {conds}){filters}
+        ORDER BY SID {"DESC" if before else "ASC"}
+        LIMIT ?"""
+
+
+def _find_storms(con: sqlite3.Connection, table: str, conds: str, params: list):
+    """(Internal) Get the summaries of the storms with a point matching
+    conds, sorted by SID; see _preferred().
+    """
+    storms = _search(con, _storms_sql(conds), params)
+    return _preferred(table, storms)
+
+
+def _find_page(
+    con: sqlite3.Connection,
+    table: str,
+    conds: str,
+    params: list,
+    after: Optional[str],
+    before: Optional[str],
+    count: int,
+) -> List[tuple]:
+    """(Internal) Get the summaries of up to count storms with a point
+    matching conds, after or before the given IBTrACS ID, sorted by SID.
+
+    If table is LastThreeYears, and some of the storms are in it, only those
+    are returned. The storms are looked up by their position in the primary
+    key of StormSummary, not counted through.
+    """
+    recent = False
+    if table == "LastThreeYears":
+        ((recent,),) = _search(con, _recent_sql(conds), params)
+    cursor = [cursor.upper() for cursor in (after, before) if cursor is not None]
+    sql = _page_sql(
+        conds, recent=recent, after=after is not None, before=before is not None
+    )
+    storms = _search(con, sql, [*params, *cursor, count])
+    if before is not None:
+        storms.reverse()
+    return storms
+
+
+def _find_storms_by_id(
+    con: sqlite3.Connection, table: str, sids: List[str], atcf_ids: List[str]
+) -> Dict[str, List[tuple]]:
+    """(Internal) Get the summaries of the storms with each of sids as their
+    IBTrACS ID and each of atcf_ids as their ATCF ID, sorted by SID; see
+    _preferred(). IDs that no storm has are left out.
+    """
+    rows = _search(
+        con,
+        f"""WITH matches(ID, SID) AS (
+            SELECT value, value FROM json_each(?)
+            UNION
+            SELECT USA_ATCF_ID, SID FROM {STORE}
+            WHERE USA_ATCF_ID IN (SELECT value FROM json_each(?))
+        )
+        SELECT m.ID, s.SID, SEASON, BASIN, NAME, ATCF_ID, PEAK_WIND, PEAK_PRES,
+            PEAK_TIME, SUBTROPICAL, s.{_RECENT}
+        FROM matches AS m JOIN StormSummary AS s ON s.SID = m.SID
+        ORDER BY m.ID, s.SID""",
+        (json.dumps(sids), json.dumps(atcf_ids)),
+    )
+    found = collections.defaultdict(list)
+    for id_, *storm in rows:
+        found[id_].append(tuple(storm))
+    return {id_: _preferred(table, storms) for id_, storms in found.items()}
 
 
 # SQLite type conversions
@@ -417,3 +2006,47 @@ def bit(val):
 sqlite3.register_converter("BIT", bit)
 sqlite3.register_converter("VARCHAR", varchar)
 sqlite3.register_converter("NUMERIC", numeric)
+
+
+def explain(table="LastThreeYears") -> str:
+    """Report how get_storm() and get_storm_page() search table for every
+    combination of filters.
+
+    Returns two lines per combination, with SQLite's query plans for
+    get_storm() and for a page after the first one. A plan that says SCAN
+    reads the whole table; SEARCH uses an index.
+    """
+    if table not in TABLES:
+        raise ValueError(ERROR_INVALID_TABLE.format(table))
+    # the values don't matter, only which filters are used
+    filters = {
+        "name": "NOT_NAMED",
+        "season": 2000,
+        "basin": "NA",
+        "atcf_id": "AL012000",
+        "ibtracs_id": "2000001N00000",
+    }
+    lines = []
+    with _reader() as con:
+        for count in range(1, len(filters) + 1):
+            for combination in itertools.combinations(filters, count):
+                conds, params = _conditions(**{k: filters[k] for k in combination})
+                queries = [(_storms_sql(conds), params)]
+                if table == "LastThreeYears":
+                    queries.append((_recent_sql(conds), params))
+                page_sql = _page_sql(
+                    conds, recent=table == "LastThreeYears", after=True, before=False
+                )
+                queries.append((page_sql, [*params, filters["ibtracs_id"], PAGE_SIZE]))
+                names = ", ".join(combination)
+                details = _plan(con, *queries[0])
+                lines.append(f"{names}: {details}")
+                details = "; ".join(_plan(con, *query) for query in queries[1:])
+                lines.append(f"{names} (page): {details}")
+    return "\n".join(lines)
+
+
+def _plan(con: sqlite3.Connection, sql: str, params) -> str:
+    """(Internal) Get SQLite's query plan for sql on one line."""
+    plan = _search(con, f"EXPLAIN QUERY PLAN {sql}", params)
+    return "; ".join(row[3] for row in plan)
@@ -1,9 +1,46 @@
+import argparse
 import asyncio
+import logging
+from . import update_db, rebuild
+from .. import http_client
+from .locales import *
 
 
 async def main():
-    print("CycloMonitor IBTrACS module")
-    print("This module currently does not have a CLI.")
+    locale_init()
+    parser = argparse.ArgumentParser(
+        prog="python3 -m cyclomonitor.ibtracs", description=IBTRACS_CLI_DESCRIPTION
+    )
+    parser.add_argument(
+        "-v", "--verbose", help=IBTRACS_HELP_VERBOSE, action="store_true"
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+    update = commands.add_parser("update", help=IBTRACS_HELP_UPDATE)
+    update.add_argument(
+        "mode", nargs="?", default="last3", choices=("last3", "all", "full")
+    )
+    update.add_argument(
+        "--from-scratch", help=IBTRACS_HELP_FROM_SCRATCH, action="store_true"
+    )
+    rebuild_parser = commands.add_parser("rebuild", help=IBTRACS_HELP_REBUILD)
+    rebuild_parser.add_argument(
+        "mode", nargs="?", default="full", choices=("last3", "all", "full")
+    )
+    args = parser.parse_args()
+    logging.basicConfig(
+        format="%(asctime)s %(name)s %(levelname)s %(message)s",
+        level=logging.DEBUG if args.verbose else logging.INFO,
+    )
+    if args.command == "update":
+        try:
+            await update_db(args.mode, incremental=not args.from_scratch)
+        finally:
+            await http_client.close()
+    else:
+        try:
+            await rebuild(args.mode)
+        except FileNotFoundError as e:
+            parser.exit(1, f"{e}\n")
 
 
 if __name__ == "__main__":
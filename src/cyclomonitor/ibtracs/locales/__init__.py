@@ -25,11 +25,42 @@ IBTRACS_UPDATE_FULL = "IBTRACS_UPDATE_FULL"
 IBTRACS_GETTING_DATA = "IBTRACS_GETTING_DATA"
 ERROR_IBTRACS_UPDATE_FAILURE = "ERROR_IBTRACS_UPDATE_FAILURE"
 ERROR_MISSING_IBTRACS_DB = "ERROR_MISSING_IBTRACS_DB"
+ERROR_OUTDATED_IBTRACS_DB = "ERROR_OUTDATED_IBTRACS_DB"
 ERROR_INVALID_TABLE = "ERROR_INVALID_TABLE"
 ERROR_INVALID_BASIN = "ERROR_INVALID_BASIN"
 ERROR_INVALID_SEASON = "ERROR_INVALID_SEASON"
 ERROR_NO_PARAMS = "ERROR_NO_PARAMS"
 IBTRACS_CONDS = "IBTRACS_CONDS"
+IBTRACS_DOWNLOAD_TIME = "IBTRACS_DOWNLOAD_TIME"
+IBTRACS_BUILD_TIME = "IBTRACS_BUILD_TIME"
+IBTRACS_TIMINGS = "IBTRACS_TIMINGS"
+IBTRACS_NEW_COLUMNS = "IBTRACS_NEW_COLUMNS"
+IBTRACS_COMPACTING = "IBTRACS_COMPACTING"
+ERROR_UNKNOWN_COLUMNS = "ERROR_UNKNOWN_COLUMNS"
+ERROR_MISSING_COLUMNS = "ERROR_MISSING_COLUMNS"
+ERROR_REIMPORT_NEEDED = "ERROR_REIMPORT_NEEDED"
+ERROR_QUERY_TIMED_OUT = "ERROR_QUERY_TIMED_OUT"
+ERROR_TWO_CURSORS = "ERROR_TWO_CURSORS"
+ERROR_INVALID_PAGE_SIZE = "ERROR_INVALID_PAGE_SIZE"
+ERROR_QUERY_CANCELLED = "ERROR_QUERY_CANCELLED"
+IBTRACS_COPYING_DB = "IBTRACS_COPYING_DB"
+IBTRACS_PUBLISHED = "IBTRACS_PUBLISHED"
+ERROR_DB_IN_USE = "ERROR_DB_IN_USE"
+IBTRACS_CLI_DESCRIPTION = "IBTRACS_CLI_DESCRIPTION"
+IBTRACS_HELP_VERBOSE = "IBTRACS_HELP_VERBOSE"
+IBTRACS_HELP_UPDATE = "IBTRACS_HELP_UPDATE"
+IBTRACS_HELP_FROM_SCRATCH = "IBTRACS_HELP_FROM_SCRATCH"
+IBTRACS_HELP_REBUILD = "IBTRACS_HELP_REBUILD"
+IBTRACS_RAW_UNCHANGED = "IBTRACS_RAW_UNCHANGED"
+IBTRACS_UP_TO_DATE = "IBTRACS_UP_TO_DATE"
+IBTRACS_RESUMING = "IBTRACS_RESUMING"
+IBTRACS_REBUILDING = "IBTRACS_REBUILDING"
+IBTRACS_BAD_VALIDATORS = "IBTRACS_BAD_VALIDATORS"
+ERROR_INCOMPLETE_DOWNLOAD = "ERROR_INCOMPLETE_DOWNLOAD"
+ERROR_NO_RAW_DATA = "ERROR_NO_RAW_DATA"
+IBTRACS_INCREMENTAL = "IBTRACS_INCREMENTAL"
+IBTRACS_NO_DIGESTS = "IBTRACS_NO_DIGESTS"
+IBTRACS_INDEXING = "IBTRACS_INDEXING"
 IBTRACS_UPDATE_SUCCESS = "IBTRACS_UPDATE_SUCCESS"
 
 _log = _logging.getLogger(__name__)
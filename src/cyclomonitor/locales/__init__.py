@@ -10,7 +10,7 @@ import logging as _logging
 LOG_TENDO_NOT_FOUND = "LOG_TENDO_NOT_FOUND"
 ERROR_ALREADY_RUNNING = "ERROR_ALREADY_RUNNING"
 LOG_MONITOR_STOP = "LOG_MONITOR_STOP"
-LOG_TIMESTAMP_COMPARISON = "LOG_TIMESTAMP_COMPARISON"
+LOG_STORM_CHANGE = "LOG_STORM_CHANGE"
 LOG_AUTO_UPDATE_BEGIN = "LOG_AUTO_UPDATE_BEGIN"
 ERROR_AUTO_UPDATE_FAILED = "ERROR_AUTO_UPDATE_FAILED"
 LOG_SUPPRESSED = "LOG_SUPPRESSED"
@@ -23,6 +23,7 @@ ERROR_LOG_SEND_FAIL = "ERROR_LOG_SEND_FAIL"
 LOG_NO_OWNER = "LOG_NO_OWNER"
 CM_AUTO_UPDATE_FAILED_MESSAGE = "CM_AUTO_UPDATE_FAILED_MESSAGE"
 LOG_IBTRACS_UPDATE_BEGIN = "LOG_IBTRACS_UPDATE_BEGIN"
+LOG_IBTRACS_UPDATE_RUNNING = "LOG_IBTRACS_UPDATE_RUNNING"
 LOG_IBTRACS_UPDATE_FAILED_ATTEMPT_1 = "LOG_IBTRACS_UPDATE_FAILED_ATTEMPT_1"
 LOG_NEXT_ATTEMPT = "LOG_NEXT_ATTEMPT"
 LOG_ATTEMPT_FAILED = "LOG_ATTEMPT_FAILED"
@@ -49,6 +50,7 @@ LOG_NO_RECORD = "LOG_NO_RECORD"
 CM_STORM_INFO = "CM_STORM_INFO"
 LOG_GUILD_UNAVAILABLE = "LOG_GUILD_UNAVAILABLE"
 CM_NO_STORMS = "CM_NO_STORMS"
+CM_STORM_DISSIPATED = "CM_STORM_DISSIPATED"
 NO_AUTO_UPDATE = "NO_AUTO_UPDATE"
 CM_NEXT_AUTO_UPDATE = "CM_NEXT_AUTO_UPDATE"
 CM_MORE_INFO = "CM_MORE_INFO"
@@ -134,10 +136,12 @@ CM_PAST_STORM_BASIN = "CM_PAST_STORM_BASIN"
 CM_PAST_STORM_ATCF = "CM_PAST_STORM_ATCF"
 CM_PAST_STORM_SID = "CM_PAST_STORM_SID"
 CM_PAST_STORM_TABLE = "CM_PAST_STORM_TABLE"
-CM_WAIT_FOR_IBTRACS_UPDATE = "CM_WAIT_FOR_IBTRACS_UPDATE"
 CM_SEARCHING = "CM_SEARCHING"
 CM_ERROR = "CM_ERROR"
 CM_MULTIPLE_STORMS = "CM_MULTIPLE_STORMS"
+CM_PREVIOUS_PAGE = "CM_PREVIOUS_PAGE"
+CM_NEXT_PAGE = "CM_NEXT_PAGE"
+CM_PAGE_NUMBER = "CM_PAGE_NUMBER"
 CM_UNNAMED_STORM = "CM_UNNAMED_STORM"
 CM_UNKNOWN = "CM_UNKNOWN"
 CM_PAST_STORM_INFO = "CM_PAST_STORM_INFO"
@@ -147,16 +151,30 @@ CM_SET_LANGUAGE = "CM_SET_LANGUAGE"
 CM_LANG_TO_USE = "CM_LANG_TO_USE"
 CM_SET_LANGUAGE_SUCCESS = "CM_SET_LANGUAGE_SUCCESS"
 ATCF_PARSE_STORM = "ATCF_PARSE_STORM"
+ATCF_PARSE_SECTOR = "ATCF_PARSE_SECTOR"
 ATCF_ERROR_COL = "ATCF_ERROR_COL"
 ATCF_WRONG_DATA = "ATCF_WRONG_DATA"
 ATCF_NO_DATA = "ATCF_NO_DATA"
+ATCF_BAD_SNAPSHOT_FILE = "ATCF_BAD_SNAPSHOT_FILE"
+ATCF_LOAD_FAILED = "ATCF_LOAD_FAILED"
+ATCF_NO_INTERP = "ATCF_NO_INTERP"
 ERROR_HDYGH = "ERROR_HDYGH"
 ATCF_GET_INTERP_FAILED = "ATCF_GET_INTERP_FAILED"
 ATCF_USING_MAIN = "ATCF_USING_MAIN"
 ATCF_USING_MAIN_FAILED = "ATCF_USING_MAIN_FAILED"
 ATCF_USING_ALT = "ATCF_USING_ALT"
+ATCF_UNCHANGED = "ATCF_UNCHANGED"
+ATCF_FRESH = "ATCF_FRESH"
+ATCF_JOINING_DOWNLOAD = "ATCF_JOINING_DOWNLOAD"
 ERROR_TIMED_OUT = "ERROR_TIMED_OUT"
 ERROR_ATCF_GET_DATA_FAILED = "ERROR_ATCF_GET_DATA_FAILED"
+ERROR_GET_FORECAST_FAILED = "ERROR_GET_FORECAST_FAILED"
+ATCF_JOINING_FORECAST = "ATCF_JOINING_FORECAST"
+ATCF_FORECAST_STALE = "ATCF_FORECAST_STALE"
+ATCF_BAD_FORECAST_FILE = "ATCF_BAD_FORECAST_FILE"
+HTTP_SESSION_STARTED = "HTTP_SESSION_STARTED"
+HTTP_STALE_SESSION = "HTTP_STALE_SESSION"
+HTTP_SESSION_CLOSED = "HTTP_SESSION_CLOSED"
 ERROR_GET_FORECAST_NO_PARAMS = "ERROR_GET_FORECAST_NO_PARAMS"
 CM_GET_FORECAST = "CM_GET_FORECAST"
 CM_NO_ACTIVE_STORMS = "CM_NO_ACTIVE_STORMS"
@@ -185,6 +203,8 @@ CLI_HELP = "CLI_HELP"
 CLI_MISSING_DOCSTRING = "CLI_MISSING_DOCSTRING"
 CLI_IS_A_VAR = "CLI_IS_A_VAR"
 CLI_STORM_NOT_FOUND = "CLI_STORM_NOT_FOUND"
+CLI_PAST_STORM_LINE = "CLI_PAST_STORM_LINE"
+CLI_PAST_STORM_MISSING = "CLI_PAST_STORM_MISSING"
 CLI_IS_A_CONSTANT = "CLI_IS_A_CONSTANT"
 CLI_ILLEGAL_NAME = "CLI_ILLEGAL_NAME"
 CLI_OLD_PY_VERSION = "CLI_OLD_PY_VERSION"
@@ -0,0 +1,49 @@
+import asyncio
+import pytest
+
+pytest.importorskip("discord")
+
+from cyclomonitor import atcf
+from cyclomonitor import cyclomonitor
+
+
+def storm(cid: str, wind: int) -> atcf.StormRecord:
+    return atcf.StormRecord(cid, "ALPHA", 1700000000, 15.0, -45.0, "ATL", wind, 1000)
+
+
+async def suppressed_after_re_ready(monkeypatch) -> bool:
+    """Post a snapshot, let a command fetch newer data, then get ready again
+    and check whether the next automatic update would be suppressed.
+    """
+    posted = atcf._publish([storm("01L", 35)])
+    old = cyclomonitor.new_monitor()
+    old.published = posted
+    monkeypatch.setattr(cyclomonitor, "cog", old, raising=False)
+    # e.g. /update refreshed the global snapshot, but posted only to one guild
+    fetched = atcf._publish([storm("01L", 65)])
+    old.cog_unload()
+    new = cyclomonitor.new_monitor()
+    try:
+        assert new.published is posted
+        changes = atcf.diff(new.published, fetched)
+        return cyclomonitor.monitor.should_suppress(changes, fetched)
+    finally:
+        new.cog_unload()
+
+
+def test_re_ready_keeps_published_snapshot(monkeypatch, tmp_path):
+    monkeypatch.chdir(tmp_path)
+    assert not asyncio.run(suppressed_after_re_ready(monkeypatch))
+
+
+async def first_monitor_published() -> atcf.StormTable:
+    first = cyclomonitor.new_monitor()
+    first.cog_unload()
+    return first.published
+
+
+def test_first_ready_uses_current_snapshot(monkeypatch, tmp_path):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.delattr(cyclomonitor, "cog", raising=False)
+    current = atcf._publish([storm("02L", 40)])
+    assert asyncio.run(first_monitor_published()) is current